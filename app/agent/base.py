@@ -4,10 +4,12 @@ from typing import List, Optional
 
 from pydantic import BaseModel, Field, model_validator
 
+from app.config import config
 from app.llm import LLM
 from app.logger import logger
 from app.sandbox.client import SANDBOX_CLIENT
 from app.schema import ROLE_TYPE, AgentState, Memory, Message
+from app.tracing import tracer
 
 
 class BaseAgent(BaseModel, ABC):
@@ -53,6 +55,13 @@ class BaseAgent(BaseModel, ABC):
             self.llm = LLM(config_name=self.name.lower())
         if not isinstance(self.memory, Memory):
             self.memory = Memory()
+        if self.memory.token_counter is None:
+            # Tokenize messages once, as they enter memory
+            self.memory.token_counter = self.llm.token_counter
+        if self.memory.image_retention is None:
+            self.memory.image_retention = config.image_retention
+        if self.memory.compaction is None:
+            self.memory.compaction = config.memory_compaction
         return self
 
     @asynccontextmanager
@@ -132,24 +141,29 @@ class BaseAgent(BaseModel, ABC):
             self.update_memory("user", request)
 
         results: List[str] = []
-        async with self.state_context(AgentState.RUNNING):
-            while (
-                self.current_step < self.max_steps and self.state != AgentState.FINISHED
-            ):
-                self.current_step += 1
-                logger.info(f"Executing step {self.current_step}/{self.max_steps}")
-                step_result = await self.step()
-
-                # Check for stuck state
-                if self.is_stuck():
-                    self.handle_stuck_state()
-
-                results.append(f"Step {self.current_step}: {step_result}")
-
-            if self.current_step >= self.max_steps:
-                self.current_step = 0
-                self.state = AgentState.IDLE
-                results.append(f"Terminated: Reached max steps ({self.max_steps})")
+        with tracer.span("agent.run", {"agent.name": self.name}) as run_span:
+            async with self.state_context(AgentState.RUNNING):
+                while (
+                    self.current_step < self.max_steps
+                    and self.state != AgentState.FINISHED
+                ):
+                    self.current_step += 1
+                    logger.info(f"Executing step {self.current_step}/{self.max_steps}")
+                    with tracer.span("agent.step", {"step": self.current_step}):
+                        step_result = await self.step()
+
+                    # Check for stuck state
+                    if self.is_stuck():
+                        run_span.add_event("agent.stuck", {"step": self.current_step})
+                        self.handle_stuck_state()
+
+                    results.append(f"Step {self.current_step}: {step_result}")
+
+                run_span.set_attribute("agent.steps", self.current_step)
+                if self.current_step >= self.max_steps:
+                    self.current_step = 0
+                    self.state = AgentState.IDLE
+                    results.append(f"Terminated: Reached max steps ({self.max_steps})")
         await SANDBOX_CLIENT.cleanup()
         return "\n".join(results) if results else "No steps executed"
 
@@ -168,22 +182,12 @@ class BaseAgent(BaseModel, ABC):
         logger.warning(f"Agent detected stuck state. Added prompt: {stuck_prompt}")
 
     def is_stuck(self) -> bool:
-        """Check if the agent is stuck in a loop by detecting duplicate content"""
+        """Check if the agent is stuck in a loop by detecting repeated responses"""
         if len(self.memory.messages) < 2:
             return False
 
-        last_message = self.memory.messages[-1]
-        if not last_message.content:
-            return False
-
-        # Count identical content occurrences
-        duplicate_count = sum(
-            1
-            for msg in reversed(self.memory.messages[:-1])
-            if msg.role == "assistant" and msg.content == last_message.content
-        )
-
-        return duplicate_count >= self.duplicate_threshold
+        # Identical content or identical tool calls both count as a repeat
+        return self.memory.repeat_count() >= self.duplicate_threshold
 
     @property
     def messages(self) -> List[Message]:
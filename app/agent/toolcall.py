@@ -1,15 +1,18 @@
 import asyncio
+import contextvars
 import json
-from typing import Any, List, Optional, Union
+from contextlib import nullcontext
+from typing import Any, List, Optional, Tuple, Union
 
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 
 from app.agent.react import ReActAgent
 from app.exceptions import TokenLimitExceeded
-from app.logger import logger
+from app.logger import digest, logger
 from app.prompt.toolcall import NEXT_STEP_PROMPT, SYSTEM_PROMPT
 from app.schema import TOOL_CHOICE_TYPE, AgentState, Message, ToolCall, ToolChoice
 from app.tool import CreateChatCompletion, Terminate, ToolCollection
+from app.tracing import traced, tracer
 
 
 TOOL_CALL_REQUIRED = "Tool calls required but none provided"
@@ -36,11 +39,38 @@ class ToolCallAgent(ReActAgent):
     max_steps: int = 30
     max_observe: Optional[Union[int, bool]] = None
 
+    # Stream tool responses and start each tool call as soon as it is complete
+    stream_tool_calls: bool = False
+    # Run calls to parallel-safe tools concurrently, at most max_parallel_tool_calls at once
+    parallel_tool_calls: bool = False
+    max_parallel_tool_calls: int = 4
+
+    # Started tool calls of the current step, in the order the model emitted them
+    _tool_tasks: List[Tuple[ToolCall, asyncio.Task]] = PrivateAttr(default_factory=list)
+    _tool_semaphore: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    # Context of the running step, so early calls aren't traced under the LLM request
+    _step_context: Optional[contextvars.Context] = PrivateAttr(default=None)
+    # Set once a streamed response reaches a call that must wait for act()
+    _dispatch_closed: bool = PrivateAttr(default=False)
+
+    async def step(self) -> str:
+        """Execute a single step, remembering its context for early tool calls"""
+        self._step_context = contextvars.copy_context()
+        try:
+            return await super().step()
+        finally:
+            self._step_context = None
+
     async def think(self) -> bool:
         """Process current state and decide next actions using tools"""
         if self.next_step_prompt:
             user_msg = Message.user_message(self.next_step_prompt)
-            self.messages += [user_msg]
+            self.memory.add_message(user_msg)
+
+        # Early dispatch only makes sense when the calls will be acted on
+        stream = self.stream_tool_calls and self.tool_choices != ToolChoice.NONE
+        self._cancel_tool_tasks()
+        self._dispatch_closed = False
 
         try:
             # Get response with tool options
@@ -53,10 +83,15 @@ class ToolCallAgent(ReActAgent):
                 ),
                 tools=self.available_tools.to_params(),
                 tool_choice=self.tool_choices,
+                tools_tokens=self.available_tools.count_tokens(self.llm.token_counter),
+                stream=stream,
+                on_tool_call=self._dispatch_tool_call if stream else None,
             )
         except ValueError:
+            self._cancel_tool_tasks()
             raise
         except Exception as e:
+            self._cancel_tool_tasks()
             # Check if this is a RetryError containing TokenLimitExceeded
             if hasattr(e, "__cause__") and isinstance(e.__cause__, TokenLimitExceeded):
                 token_limit_error = e.__cause__
@@ -137,38 +172,128 @@ class ToolCallAgent(ReActAgent):
             # Return last message content if no tool calls
             return self.messages[-1].content or "No content or commands to execute"
 
-        results = []
+        # Calls dispatched while the response streamed are reused if the final
+        # response holds them. A retried request dispatches its calls again, so
+        # the latest dispatch of an id wins and the rest are cancelled.
+        dispatched = {command.id: (command, task) for command, task in self._tool_tasks}
+        stale = [task for _, task in self._tool_tasks]
+        self._tool_tasks = []
         for command in self.tool_calls:
-            # Reset base64_image for each tool call
-            self._current_base64_image = None
-
-            result = await self.execute_tool(command)
+            early = dispatched.pop(command.id, None)
+            if early and (
+                early[0].function.name == command.function.name
+                and early[0].function.arguments == command.function.arguments
+            ):
+                self._tool_tasks.append(early)
+                stale.remove(early[1])
+            else:
+                self._start_tool_call(command)
+        for task in stale:
+            task.cancel()
+        outcomes = await asyncio.gather(*(task for _, task in self._tool_tasks))
+        self._tool_tasks.clear()
 
+        results = []
+        for command, (result, base64_image) in zip(self.tool_calls, outcomes):
             if self.max_observe:
                 result = result[: self.max_observe]
 
             logger.info(
-                f"🎯 Tool '{command.function.name}' completed its mission! Result: {result}"
+                f"🎯 Tool '{command.function.name}' completed its mission! Result: {digest(result)}"
             )
 
-            # Add tool response to memory
+            # Add tool response to memory, in the order the calls were made
             tool_msg = Message.tool_message(
                 content=result,
                 tool_call_id=command.id,
                 name=command.function.name,
-                base64_image=self._current_base64_image,
+                base64_image=base64_image,
             )
             self.memory.add_message(tool_msg)
             results.append(result)
 
         return "\n\n".join(results)
 
+    def _runs_in_parallel(self, command: ToolCall) -> bool:
+        """Check if a tool call may run alongside other parallel-safe calls"""
+        if not self.parallel_tool_calls:
+            return False
+        tool = self.available_tools.get_tool(command.function.name)
+        return bool(tool and tool.parallel_safe)
+
+    def _start_tool_call(
+        self, command: ToolCall, context: Optional[contextvars.Context] = None
+    ) -> asyncio.Task:
+        """Schedule a tool call after the already started calls it must follow.
+
+        Exclusive calls wait for every earlier call, while parallel-safe calls
+        only wait for earlier exclusive calls.
+        """
+        parallel = self._runs_in_parallel(command)
+        after = [
+            task
+            for earlier, task in self._tool_tasks
+            if not (parallel and self._runs_in_parallel(earlier))
+        ]
+        task = asyncio.create_task(
+            self._run_tool_call(command, after, parallel), context=context
+        )
+        self._tool_tasks.append((command, task))
+        return task
+
+    async def _run_tool_call(
+        self,
+        command: ToolCall,
+        after: List[asyncio.Task],
+        parallel: bool = False,
+    ) -> Tuple[str, Optional[str]]:
+        """Execute a tool call, returning its observation and any captured image"""
+        if after:
+            await asyncio.wait(after)
+
+        if parallel and self._tool_semaphore is None:
+            self._tool_semaphore = asyncio.Semaphore(self.max_parallel_tool_calls)
+
+        async with self._tool_semaphore if parallel else nullcontext():
+            # Reset base64_image for each tool call
+            self._current_base64_image = None
+            result = await self.execute_tool(command)
+            return result, self._current_base64_image
+
+    def _dispatch_tool_call(self, command: ToolCall) -> None:
+        """
+        Start a tool call while the rest of the response is still streaming.
+
+        Only parallel-safe tools start early. The request may still fail and be
+        retried, and a shell command or file edit that already ran can't be
+        undone. Once an exclusive call shows up, it and every later call wait
+        for act(), so they still run in order.
+        """
+        if self._dispatch_closed:
+            return
+        tool = self.available_tools.get_tool(command.function.name)
+        if not (tool and tool.parallel_safe):
+            self._dispatch_closed = True
+            return
+        logger.info(f"⚡ Dispatching tool '{command.function.name}' early")
+        # Each task gets its own copy, as tools set the current span in it
+        context = self._step_context.copy() if self._step_context else None
+        self._start_tool_call(command, context)
+
+    def _cancel_tool_tasks(self) -> None:
+        for _, task in self._tool_tasks:
+            task.cancel()
+        self._tool_tasks.clear()
+
+    @traced("tool.execute")
     async def execute_tool(self, command: ToolCall) -> str:
         """Execute a single tool call with robust error handling"""
         if not command or not command.function or not command.function.name:
             return "Error: Invalid command format"
 
         name = command.function.name
+        span = tracer.current_span()
+        span.set_attribute("tool.name", name)
         if name not in self.available_tools.tool_map:
             return f"Error: Unknown tool '{name}'"
 
@@ -179,24 +304,17 @@ class ToolCallAgent(ReActAgent):
             # Execute the tool
             logger.info(f"🔧 Activating tool: '{name}'...")
             result = await self.available_tools.execute(name=name, tool_input=args)
+            if getattr(result, "error", None):
+                span.set_attribute("tool.error", str(result.error))
 
             # Handle special tools
             await self._handle_special_tool(name=name, result=result)
 
-            # Check if result is a ToolResult with base64_image
-            if hasattr(result, "base64_image") and result.base64_image:
-                # Store the base64_image for later use in tool_message
-                self._current_base64_image = result.base64_image
-
-                # Format result for display
-                observation = (
-                    f"Observed output of cmd `{name}` executed:\n{str(result)}"
-                    if result
-                    else f"Cmd `{name}` completed with no output"
-                )
-                return observation
+            # Store the base64_image for later use in tool_message. It is set on
+            # every path, after the last await, so concurrent calls can't mix images.
+            self._current_base64_image = getattr(result, "base64_image", None)
 
-            # Format result for display (standard case)
+            # Format result for display
             observation = (
                 f"Observed output of cmd `{name}` executed:\n{str(result)}"
                 if result
@@ -204,13 +322,17 @@ class ToolCallAgent(ReActAgent):
             )
 
             return observation
-        except json.JSONDecodeError:
+        except json.JSONDecodeError as e:
+            span.record_exception(e)
+            self._current_base64_image = None
             error_msg = f"Error parsing arguments for {name}: Invalid JSON format"
             logger.error(
                 f"📝 Oops! The arguments for '{name}' don't make sense - invalid JSON, arguments:{command.function.arguments}"
             )
             return f"Error: {error_msg}"
         except Exception as e:
+            span.record_exception(e)
+            self._current_base64_image = None
             error_msg = f"⚠️ Tool '{name}' encountered a problem: {str(e)}"
             logger.exception(error_msg)
             return f"Error: {error_msg}"
@@ -1,9 +1,10 @@
+import asyncio
 import json
 import sys
 import time
 import uuid
 from datetime import datetime
-from typing import Dict, List, Literal, Optional
+from typing import Any, AsyncIterator, Dict, Iterable, List, Literal, Optional
 
 import boto3
 
@@ -192,6 +193,17 @@ class ChatCompletions:
         }
         return OpenAIResponse(openai_format)
 
+    @staticmethod
+    async def _iterate_stream(stream: Iterable[Any]) -> AsyncIterator[Any]:
+        # Each read of a boto3 event stream blocks on the socket, so pull events in a worker thread
+        iterator = iter(stream)
+        done = object()
+        while True:
+            event = await asyncio.to_thread(next, iterator, done)
+            if event is done:
+                break
+            yield event
+
     async def _invoke_bedrock(
         self,
         model: str,
@@ -207,7 +219,9 @@ class ChatCompletions:
             system_prompt,
             bedrock_messages,
         ) = self._convert_openai_messages_to_bedrock_format(messages)
-        response = self.client.converse(
+        # boto3 is blocking, so run the call in a worker thread to keep the loop free
+        response = await asyncio.to_thread(
+            self.client.converse,
             modelId=model,
             system=system_prompt,
             messages=bedrock_messages,
@@ -232,7 +246,8 @@ class ChatCompletions:
             system_prompt,
             bedrock_messages,
         ) = self._convert_openai_messages_to_bedrock_format(messages)
-        response = self.client.converse_stream(
+        response = await asyncio.to_thread(
+            self.client.converse_stream,
             modelId=model,
             system=system_prompt,
             messages=bedrock_messages,
@@ -253,7 +268,7 @@ class ChatCompletions:
         # Process streaming response
         stream = response.get("stream")
         if stream:
-            for event in stream:
+            async for event in self._iterate_stream(stream):
                 if event.get("messageStart", {}).get("role"):
                     bedrock_response["output"]["message"]["role"] = event[
                         "messageStart"
@@ -0,0 +1,261 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+from app.logger import logger
+
+
+class TTLCache:
+    """Size-bounded LRU cache with expiry and optional on-disk persistence.
+
+    Values must be JSON-serializable. When a directory is given, every entry is
+    also written there as one JSON file, so the cache survives restarts and can
+    be shared by processes pointing at the same directory.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl: Optional[float] = None,
+        directory: Optional[Union[str, Path]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.directory = Path(directory) if directory else None
+        if self.directory:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(data: Any) -> str:
+        """Build a stable key from any JSON-like data"""
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if not self._expired(entry[0]):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entries beyond the limit"""
+        entry = (time.time(), value)
+        with self._lock:
+            self._remember(key, entry)
+        self._store(key, entry)
+
+    @property
+    def persistent(self) -> bool:
+        """Whether entries are read from and written to disk"""
+        return self.directory is not None
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Like get, but without blocking the event loop on disk reads"""
+        if not self.persistent:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """Like set, but without blocking the event loop on disk writes"""
+        if not self.persistent:
+            return self.set(key, value)
+        await asyncio.to_thread(self.set, key, value)
+
+    def clear(self) -> None:
+        """Remove all entries, including persisted ones"""
+        with self._lock:
+            self._entries.clear()
+        if self.directory:
+            for path in self.directory.glob("*.json"):
+                path.unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and the number of entries held in memory"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _remember(self, key: str, entry: Tuple[float, Any]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _load(self, key: str) -> Optional[Tuple[float, Any]]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+        if self._expired(data["created"]):
+            path.unlink(missing_ok=True)
+            return None
+        # Touch the file so disk eviction also follows recent use
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data["created"], data["value"]
+
+    def _store(self, key: str, entry: Tuple[float, Any]) -> None:
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            tmp_path.write_text(
+                json.dumps(
+                    {"created": entry[0], "value": entry[1]}, ensure_ascii=False
+                ),
+                encoding="utf-8",
+            )
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Failed to persist cache entry {path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        files = sorted(self.directory.glob("*.json"), key=self._mtime)
+        for stale in files[: max(0, len(files) - self.max_entries)]:
+            stale.unlink(missing_ok=True)
+
+    @staticmethod
+    def _mtime(path: Path) -> float:
+        try:
+            return path.stat().st_mtime
+        except FileNotFoundError:
+            # Removed by another process sharing the directory
+            return 0.0
+
+
+class SQLiteCache(TTLCache):
+    """TTLCache persisted to a SQLite database instead of a directory of files.
+
+    Any number of processes can share the database; SQLite serializes their
+    writes. Entries are evicted least recently used first once the database
+    holds more than max_entries, or once their encoded values take more than
+    max_bytes.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = 1000,
+        ttl: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self.max_bytes = max_bytes
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, created REAL, used REAL, value TEXT)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+
+    @property
+    def persistent(self) -> bool:
+        return True
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a connection for one transaction"""
+        # A connection per operation keeps the cache usable from any thread
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        try:
+            with self._connect() as db:
+                db.execute("DELETE FROM entries")
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to clear cache database {self.path}: {e}")
+
+    def _load(self, key: str) -> Optional[Tuple[float, Any]]:
+        try:
+            with self._connect() as db:
+                row = db.execute(
+                    "SELECT created, value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                if self._expired(row[0]):
+                    db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    return None
+                db.execute(
+                    "UPDATE entries SET used = ? WHERE key = ?", (time.time(), key)
+                )
+            return row[0], json.loads(row[1])
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+
+    def _store(self, key: str, entry: Tuple[float, Any]) -> None:
+        try:
+            value = json.dumps(entry[1], ensure_ascii=False)
+            with self._connect() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                    (key, entry[0], entry[0], value),
+                )
+                db.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries "
+                    "ORDER BY used DESC, rowid DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                if self.max_bytes is not None:
+                    db.execute(
+                        "DELETE FROM entries WHERE key IN (SELECT key FROM ("
+                        "SELECT key, SUM(LENGTH(CAST(value AS BLOB))) OVER "
+                        "(ORDER BY used DESC, rowid DESC) AS total FROM entries) "
+                        "WHERE total > ?)",
+                        (self.max_bytes,),
+                    )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.warning(f"Failed to persist cache entry {key}: {e}")
@@ -1,7 +1,7 @@
 import threading
 import tomllib
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -27,6 +27,157 @@ class LLMSettings(BaseModel):
     temperature: float = Field(1.0, description="Sampling temperature")
     api_type: str = Field(..., description="Azure, Openai, or Ollama")
     api_version: str = Field(..., description="Azure Openai version if AzureOpenai")
+    max_connections: int = Field(
+        1000, description="Maximum number of HTTP connections to the API endpoint"
+    )
+    max_keepalive_connections: int = Field(
+        100, description="Maximum number of idle HTTP connections kept alive"
+    )
+    keepalive_expiry: float = Field(
+        30.0, description="Seconds an idle HTTP connection is kept alive"
+    )
+
+
+class ResponseCacheSettings(BaseModel):
+    """Configuration for caching deterministic LLM responses"""
+
+    enabled: bool = Field(False, description="Whether to cache LLM responses")
+    ttl: Optional[int] = Field(
+        86400, description="Seconds a cached response stays valid (None for no expiry)"
+    )
+    max_entries: int = Field(1000, description="Maximum number of cached responses")
+    directory: Optional[str] = Field(
+        None,
+        description="Directory to persist responses in, relative to the project root (memory only if unset)",
+    )
+
+
+class SearchCacheSettings(BaseModel):
+    """Configuration for caching web search results"""
+
+    enabled: bool = Field(False, description="Whether to cache search results")
+    ttl: Optional[int] = Field(
+        3600, description="Seconds cached results stay valid (None for no expiry)"
+    )
+    max_entries: int = Field(500, description="Maximum number of cached searches")
+    database: Optional[str] = Field(
+        None,
+        description="SQLite file shared by processes, relative to the project root (memory only if unset)",
+    )
+
+
+class PageCacheSettings(BaseModel):
+    """Configuration for caching the extracted content of fetched pages"""
+
+    enabled: bool = Field(False, description="Whether to cache fetched pages")
+    database: str = Field(
+        ".cache/pages.sqlite",
+        description="SQLite file shared by processes, relative to the project root",
+    )
+    max_age: int = Field(
+        3600,
+        description="Seconds a cached page is used before it is revalidated with the server",
+    )
+    max_entries: int = Field(2000, description="Maximum number of cached pages")
+    max_size_mb: Optional[float] = Field(
+        50, description="Maximum size of the cache database content in MB"
+    )
+    offline: bool = Field(
+        False, description="Serve pages only from the cache, without network access"
+    )
+
+
+class ImageRetentionSettings(BaseModel):
+    """Configuration for how long images stay at full detail in agent memory"""
+
+    keep_full: Optional[int] = Field(
+        None,
+        description="Number of most recent images kept at full detail (None keeps all)",
+    )
+    older: Literal["low", "drop"] = Field(
+        "low",
+        description="Downscale older images and send them at low detail, or drop them",
+    )
+    low_max_size: int = Field(
+        512, description="Longest side in pixels of downscaled images"
+    )
+    low_quality: int = Field(60, description="JPEG quality of downscaled images")
+
+
+class MemoryCompactionSettings(BaseModel):
+    """Configuration for keeping agent memory within a token budget"""
+
+    token_budget: Optional[int] = Field(
+        None, description="Maximum tokens kept in memory (None disables compaction)"
+    )
+    keep_recent: int = Field(
+        6, description="Number of most recent messages that are never compacted"
+    )
+    observation_max_chars: int = Field(
+        1000, description="Length older tool results are cut to before any are dropped"
+    )
+
+
+class LLMTransportSettings(BaseModel):
+    """Configuration for recording or replaying LLM traffic"""
+
+    mode: Optional[Literal["record", "replay"]] = Field(
+        None, description="Record LLM requests to a file or replay them from it"
+    )
+    path: str = Field(
+        "recordings/llm.jsonl",
+        description="Recording file, relative to the project root",
+    )
+    latency_scale: float = Field(
+        0.0,
+        description="Multiplier for recorded latency when replaying (0 replays instantly)",
+    )
+    strict: bool = Field(
+        True,
+        description="Fail on unmatched requests instead of replaying recordings in order",
+    )
+
+
+class TracingSettings(BaseModel):
+    """Configuration for exporting agent, LLM and tool spans"""
+
+    enabled: bool = Field(False, description="Whether to record spans")
+    exporter: Literal["jsonl", "otlp"] = Field(
+        "jsonl", description="Write spans as flat JSON lines or as OTLP JSON"
+    )
+    path: str = Field(
+        "logs/traces.jsonl", description="Span file, relative to the project root"
+    )
+    service_name: str = Field(
+        "openmanus", description="Service name reported in OTLP resources"
+    )
+
+
+class LoggingSettings(BaseModel):
+    """Configuration for the log file and how records are written"""
+
+    enqueue: bool = Field(
+        False,
+        description="Write log records from a background thread instead of the caller's",
+    )
+    buffer_size: Optional[int] = Field(
+        None,
+        description="Bytes of log output collected before each file write (None writes every line)",
+    )
+    rotation: Optional[str] = Field(
+        None, description="Start a new log file at this size or interval, e.g. '50 MB'"
+    )
+    retention: Optional[str] = Field(
+        None,
+        description="How long or how many rotated log files are kept, e.g. '7 days'",
+    )
+    compression: Optional[str] = Field(
+        None, description="Archive format for rotated log files, e.g. 'gz' or 'zip'"
+    )
+    result_digest_threshold: Optional[int] = Field(
+        None,
+        description="Log tool results longer than this as their length and hash (None logs them in full)",
+    )
 
 
 class ProxySettings(BaseModel):
@@ -57,6 +208,50 @@ class SearchSettings(BaseModel):
         default="us",
         description="Country code for search results (e.g., us, cn, uk)",
     )
+    race: bool = Field(
+        default=False,
+        description="Query several engines at once instead of one after another",
+    )
+    race_engines: int = Field(
+        default=2,
+        description="Number of engines queried at once in race mode",
+    )
+    race_merge: bool = Field(
+        default=False,
+        description="In race mode, merge results of all raced engines instead of taking the first",
+    )
+    adaptive_order: bool = Field(
+        default=False,
+        description="Try engines with lower observed latency and error rate first",
+    )
+    rate_limit: Optional[float] = Field(
+        default=None,
+        description="Searches per second allowed for each engine (None for no limit)",
+    )
+    engine_rate_limits: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Searches per second for specific engines, overriding rate_limit",
+    )
+    rate_limit_burst: int = Field(
+        default=2,
+        description="Searches an engine may receive at once before the rate limit applies",
+    )
+    rate_limit_max_wait: float = Field(
+        default=5.0,
+        description="Longest wait in seconds for a rate-limited engine before moving on to the next one",
+    )
+    circuit_breaker: bool = Field(
+        default=False,
+        description="Skip engines that keep failing and probe them in the background, instead of retrying all engines",
+    )
+    breaker_threshold: int = Field(
+        default=3,
+        description="Consecutive failures that open an engine's circuit",
+    )
+    breaker_cooldown: float = Field(
+        default=60.0,
+        description="Seconds before an open circuit is probed, doubled after each failed probe",
+    )
 
 
 class BrowserSettings(BaseModel):
@@ -118,6 +313,30 @@ class AppConfig(BaseModel):
         None, description="Search configuration"
     )
     mcp_config: Optional[MCPSettings] = Field(None, description="MCP configuration")
+    response_cache: Optional[ResponseCacheSettings] = Field(
+        None, description="LLM response cache configuration"
+    )
+    llm_transport: Optional[LLMTransportSettings] = Field(
+        None, description="LLM record/replay configuration"
+    )
+    search_cache: Optional[SearchCacheSettings] = Field(
+        None, description="Search result cache configuration"
+    )
+    page_cache: Optional[PageCacheSettings] = Field(
+        None, description="Fetched page cache configuration"
+    )
+    image_retention: Optional[ImageRetentionSettings] = Field(
+        None, description="Memory image retention configuration"
+    )
+    memory_compaction: Optional[MemoryCompactionSettings] = Field(
+        None, description="Memory compaction configuration"
+    )
+    tracing: Optional[TracingSettings] = Field(
+        None, description="Tracing configuration"
+    )
+    logging: Optional[LoggingSettings] = Field(
+        None, description="Logging configuration"
+    )
 
     class Config:
         arbitrary_types_allowed = True
@@ -175,6 +394,9 @@ class Config:
             "temperature": base_llm.get("temperature", 1.0),
             "api_type": base_llm.get("api_type", ""),
             "api_version": base_llm.get("api_version", ""),
+            "max_connections": base_llm.get("max_connections", 1000),
+            "max_keepalive_connections": base_llm.get("max_keepalive_connections", 100),
+            "keepalive_expiry": base_llm.get("keepalive_expiry", 30.0),
         }
 
         # handle browser config.
@@ -227,6 +449,32 @@ class Config:
         else:
             mcp_settings = MCPSettings()
 
+        response_cache_config = raw_config.get("response_cache", {})
+        response_cache_settings = ResponseCacheSettings(**response_cache_config)
+
+        llm_transport_config = raw_config.get("llm_transport", {})
+        llm_transport_settings = LLMTransportSettings(**llm_transport_config)
+
+        search_cache_config = raw_config.get("search_cache", {})
+        search_cache_settings = SearchCacheSettings(**search_cache_config)
+
+        page_cache_config = raw_config.get("page_cache", {})
+        page_cache_settings = PageCacheSettings(**page_cache_config)
+
+        image_retention_config = raw_config.get("image_retention", {})
+        image_retention_settings = ImageRetentionSettings(**image_retention_config)
+
+        memory_compaction_config = raw_config.get("memory_compaction", {})
+        memory_compaction_settings = MemoryCompactionSettings(
+            **memory_compaction_config
+        )
+
+        tracing_config = raw_config.get("tracing", {})
+        tracing_settings = TracingSettings(**tracing_config)
+
+        logging_config = raw_config.get("logging", {})
+        logging_settings = LoggingSettings(**logging_config)
+
         config_dict = {
             "llm": {
                 "default": default_settings,
@@ -239,6 +487,14 @@ class Config:
             "browser_config": browser_settings,
             "search_config": search_settings,
             "mcp_config": mcp_settings,
+            "response_cache": response_cache_settings,
+            "llm_transport": llm_transport_settings,
+            "search_cache": search_cache_settings,
+            "page_cache": page_cache_settings,
+            "image_retention": image_retention_settings,
+            "memory_compaction": memory_compaction_settings,
+            "tracing": tracing_settings,
+            "logging": logging_settings,
         }
 
         self._config = AppConfig(**config_dict)
@@ -264,6 +520,46 @@ class Config:
         """Get the MCP configuration"""
         return self._config.mcp_config
 
+    @property
+    def response_cache(self) -> ResponseCacheSettings:
+        """Get the LLM response cache configuration"""
+        return self._config.response_cache
+
+    @property
+    def llm_transport(self) -> LLMTransportSettings:
+        """Get the LLM record/replay configuration"""
+        return self._config.llm_transport
+
+    @property
+    def search_cache(self) -> SearchCacheSettings:
+        """Get the search result cache configuration"""
+        return self._config.search_cache
+
+    @property
+    def page_cache(self) -> PageCacheSettings:
+        """Get the fetched page cache configuration"""
+        return self._config.page_cache
+
+    @property
+    def image_retention(self) -> ImageRetentionSettings:
+        """Get the memory image retention configuration"""
+        return self._config.image_retention
+
+    @property
+    def memory_compaction(self) -> MemoryCompactionSettings:
+        """Get the memory compaction configuration"""
+        return self._config.memory_compaction
+
+    @property
+    def tracing(self) -> TracingSettings:
+        """Get the tracing configuration"""
+        return self._config.tracing
+
+    @property
+    def logging(self) -> LoggingSettings:
+        """Get the logging configuration"""
+        return self._config.logging
+
     @property
     def workspace_root(self) -> Path:
         """Get the workspace root directory"""
@@ -0,0 +1,363 @@
+"""
+HTML to text and markdown extraction.
+
+`extract_page` parses a page with lxml, drops scripts, navigation and other
+boilerplate, and picks the main content with a readability-style heuristic:
+text blocks score their parent and grandparent by length and comma count,
+scores are adjusted by class and id names and by link density, and the best
+container is kept together with similarly scored siblings. The result is
+rendered both as plain text and as markdown.
+
+Parsing a multi-megabyte page takes long enough to stall an event loop, so
+`HTMLExtractor` runs large pages in a shared process pool. Besides the
+standard library, this module only imports lxml and pydantic and nothing else
+from the app, so pool workers start quickly.
+"""
+import asyncio
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Union
+
+import lxml.html
+from lxml import etree
+from pydantic import BaseModel, Field
+
+
+DROP_TAGS = (
+    "script",
+    "style",
+    "noscript",
+    "template",
+    "iframe",
+    "svg",
+    "canvas",
+    "object",
+    "embed",
+    "form",
+    "button",
+    "select",
+    "textarea",
+    "nav",
+    "header",
+    "footer",
+    "aside",
+)
+BLOCK_TAGS = frozenset(
+    {
+        "address",
+        "article",
+        "blockquote",
+        "dd",
+        "div",
+        "dl",
+        "dt",
+        "figcaption",
+        "figure",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "hr",
+        "li",
+        "main",
+        "ol",
+        "p",
+        "pre",
+        "section",
+        "table",
+        "td",
+        "th",
+        "tr",
+        "ul",
+    }
+)
+TEXT_BLOCK_TAGS = ("p", "pre", "td", "blockquote", "li")
+POSITIVE_NAMES = re.compile(
+    r"article|body|content|entry|main|page|post|text|blog|story|answer|question",
+    re.I,
+)
+NEGATIVE_NAMES = re.compile(
+    r"comment|meta|footer|footnote|sidebar|sponsor|banner|advert|share|social|"
+    r"related|promo|nav|menu|cookie|popup|subscribe|byline",
+    re.I,
+)
+# Below this many characters the best container is likely a fragment
+MIN_CONTENT_CHARS = 140
+_WHITESPACE = re.compile(r"\s+")
+_XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+
+class ExtractedPage(BaseModel):
+    """Readable content of a web page."""
+
+    title: str = Field(default="", description="Page title")
+    text: str = Field(default="", description="Main content as plain text")
+    markdown: str = Field(default="", description="Main content as markdown")
+
+
+def extract_page(html: Union[str, bytes], url: Optional[str] = None) -> Dict[str, str]:
+    """
+    Extract the title and main content of an HTML page.
+
+    Returns a plain dict so results are cheap to send back from pool workers.
+    Relative links in the markdown are resolved against url when given.
+    """
+    if isinstance(html, str):
+        # lxml rejects strings that declare their own encoding
+        html = _XML_DECLARATION.sub("", html, count=1)
+    try:
+        root = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return {"title": "", "text": "", "markdown": ""}
+
+    title = _collapse(root.findtext(".//title") or "")
+    etree.strip_elements(root, etree.Comment, *DROP_TAGS, with_tail=False)
+    if url:
+        try:
+            root.make_links_absolute(url, resolve_base_href=True)
+        except ValueError:
+            pass
+
+    nodes = main_content(root)
+    return {
+        "title": title,
+        "text": _to_text(nodes),
+        "markdown": _to_markdown(nodes),
+    }
+
+
+def main_content(root: lxml.html.HtmlElement) -> List[lxml.html.HtmlElement]:
+    """Pick the elements holding the main content of a page, in document order"""
+    body = root.find("body")
+    fallback = [body if body is not None else root]
+
+    scores: Dict[lxml.html.HtmlElement, float] = {}
+    for block in root.iter(*TEXT_BLOCK_TAGS):
+        text = block.text_content()
+        length = len(text.strip())
+        if length < 25:
+            continue
+        score = 1 + text.count(",") + min(length // 100, 3)
+        parent = block.getparent()
+        grandparent = parent.getparent() if parent is not None else None
+        for node, share in ((parent, 1.0), (grandparent, 0.5)):
+            if node is None or not isinstance(node.tag, str):
+                continue
+            if node not in scores:
+                scores[node] = _name_weight(node)
+            scores[node] += score * share
+
+    if not scores:
+        return fallback
+
+    for node in scores:
+        scores[node] *= 1 - _link_density(node)
+    best = max(scores, key=scores.get)
+    if scores[best] <= 0:
+        return fallback
+
+    # A container scoring about as well as its best child holds more content
+    parent = best.getparent()
+    while (
+        parent is not None
+        and parent.tag not in ("body", "html")
+        and scores.get(parent, 0) >= scores[best] * 0.8
+    ):
+        best, parent = parent, parent.getparent()
+
+    # Content is often split over sibling containers, such as several answers
+    if parent is None or best.tag in ("body", "html"):
+        nodes = [best]
+    else:
+        threshold = max(10.0, scores[best] * 0.2)
+        nodes = [
+            sibling
+            for sibling in parent
+            if sibling is best or scores.get(sibling, 0) >= threshold
+        ]
+
+    if sum(len(node.text_content().strip()) for node in nodes) < MIN_CONTENT_CHARS:
+        return fallback
+    return nodes
+
+
+def _name_weight(node: lxml.html.HtmlElement) -> float:
+    weight = 10.0 if node.tag in ("article", "main") else 0.0
+    names = f"{node.get('class', '')} {node.get('id', '')}"
+    if POSITIVE_NAMES.search(names):
+        weight += 25
+    if NEGATIVE_NAMES.search(names):
+        weight -= 25
+    return weight
+
+
+def _link_density(node: lxml.html.HtmlElement) -> float:
+    length = len(node.text_content())
+    if not length:
+        return 0.0
+    link_length = sum(len(link.text_content()) for link in node.iter("a"))
+    return min(1.0, link_length / length)
+
+
+def _collapse(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _to_text(nodes: Iterable[lxml.html.HtmlElement]) -> str:
+    """Render elements as text with one line per block"""
+    parts: List[str] = []
+
+    def walk(node: lxml.html.HtmlElement) -> None:
+        # Table cells stay on their row's line
+        block = node.tag not in ("td", "th") and (
+            node.tag in BLOCK_TAGS or node.tag == "br"
+        )
+        if block:
+            parts.append("\n")
+        elif node.tag in ("td", "th"):
+            parts.append(" ")
+        if node.text:
+            parts.append(node.text)
+        for child in node:
+            if isinstance(child.tag, str):
+                walk(child)
+            if child.tail:
+                parts.append(child.tail)
+        if block:
+            parts.append("\n")
+
+    for node in nodes:
+        walk(node)
+    lines = (_collapse(line) for line in "".join(parts).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def _to_markdown(nodes: Iterable[lxml.html.HtmlElement]) -> str:
+    markdown = "".join(_markdown(node) for node in nodes)
+    lines = [line.rstrip() for line in markdown.split("\n")]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def _inline(node: lxml.html.HtmlElement) -> str:
+    """Render the contents of an element, without the element itself"""
+    parts = [_WHITESPACE.sub(" ", node.text or "")]
+    for child in node:
+        if isinstance(child.tag, str):
+            parts.append(_markdown(child))
+        parts.append(_WHITESPACE.sub(" ", child.tail or ""))
+    return "".join(parts)
+
+
+def _markdown(node: lxml.html.HtmlElement) -> str:
+    tag = node.tag
+    if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+        return f"\n\n{'#' * int(tag[1])} {_inline(node).strip()}\n\n"
+    if tag == "pre":
+        return f"\n\n```\n{node.text_content().strip(chr(10))}\n```\n\n"
+    if tag == "code":
+        return f"`{node.text_content()}`"
+    if tag == "br":
+        return "\n"
+    if tag == "hr":
+        return "\n\n---\n\n"
+    if tag in ("strong", "b"):
+        inner = _inline(node).strip()
+        return f"**{inner}**" if inner else ""
+    if tag in ("em", "i"):
+        inner = _inline(node).strip()
+        return f"*{inner}*" if inner else ""
+    if tag == "a":
+        inner = _inline(node).strip()
+        href = node.get("href")
+        return f"[{inner}]({href})" if inner and href else inner
+    if tag in ("ul", "ol"):
+        items = [child for child in node if child.tag == "li"]
+        lines = [
+            f"{f'{i}.' if tag == 'ol' else '-'} {_inline(item).strip()}"
+            for i, item in enumerate(items, 1)
+        ]
+        return "\n\n" + "\n".join(lines) + "\n\n"
+    if tag == "blockquote":
+        inner = _inline(node).strip()
+        return "\n\n" + "\n".join(f"> {line}" for line in inner.split("\n")) + "\n\n"
+    if tag == "table":
+        return _table(node)
+    if tag in BLOCK_TAGS:
+        return f"\n\n{_inline(node).strip()}\n\n"
+    return _inline(node)
+
+
+def _table(node: lxml.html.HtmlElement) -> str:
+    rows = [
+        [_collapse(_inline(cell)) for cell in row if cell.tag in ("td", "th")]
+        for row in node.iter("tr")
+    ]
+    rows = [row for row in rows if row]
+    if not rows:
+        return ""
+    width = max(len(row) for row in rows)
+    lines = ["| " + " | ".join(row + [""] * (width - len(row))) + " |" for row in rows]
+    lines.insert(1, "|" + " --- |" * width)
+    return "\n\n" + "\n".join(lines) + "\n\n"
+
+
+class HTMLExtractor:
+    """
+    Runs `extract_page` in a shared process pool.
+
+    Pages shorter than `inline_limit` characters are parsed in the calling
+    thread, as sending them to a worker would cost more than parsing them.
+    """
+
+    max_workers = min(4, os.cpu_count() or 1)
+    inline_limit = 100_000
+    start_method = (
+        "forkserver"
+        if "forkserver" in multiprocessing.get_all_start_methods()
+        else "spawn"
+    )
+
+    _pool: Optional[ProcessPoolExecutor] = None
+
+    @classmethod
+    def _get_pool(cls) -> ProcessPoolExecutor:
+        if cls._pool is None:
+            # Forking copies locks held by other threads (log queue, search
+            # executor), which can deadlock a worker; forkserver workers start
+            # from a clean process and only need to import lxml
+            cls._pool = ProcessPoolExecutor(
+                max_workers=cls.max_workers,
+                mp_context=multiprocessing.get_context(cls.start_method),
+            )
+        return cls._pool
+
+    @classmethod
+    async def extract(
+        cls, html: Union[str, bytes], url: Optional[str] = None
+    ) -> ExtractedPage:
+        """Extract a page, in a worker process if it is large"""
+        if len(html) < cls.inline_limit:
+            return ExtractedPage(**extract_page(html, url))
+
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(
+                cls._get_pool(), extract_page, html, url
+            )
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool next time and finish this page here
+            cls._pool = None
+            result = extract_page(html, url)
+        return ExtractedPage(**result)
+
+    @classmethod
+    def shutdown(cls, wait: bool = False) -> None:
+        """Stop the worker processes"""
+        if cls._pool is not None:
+            cls._pool.shutdown(wait=wait, cancel_futures=True)
+            cls._pool = None
@@ -1,12 +1,18 @@
+import hashlib
+import json
 import math
-from typing import Dict, List, Optional, Union
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
+import httpx
 import tiktoken
 from openai import (
     APIError,
     AsyncAzureOpenAI,
     AsyncOpenAI,
     AuthenticationError,
+    DefaultAsyncHttpxClient,
     OpenAIError,
     RateLimitError,
 )
@@ -14,11 +20,13 @@ from openai.types.chat import ChatCompletion, ChatCompletionMessage
 from tenacity import (
     retry,
     retry_if_exception_type,
+    retry_if_not_exception_type,
     stop_after_attempt,
     wait_random_exponential,
 )
 
 from app.bedrock import BedrockClient
+from app.cache import TTLCache
 from app.config import LLMSettings, config
 from app.exceptions import TokenLimitExceeded
 from app.logger import logger  # Assuming a logger is set up in your app
@@ -26,9 +34,13 @@ from app.schema import (
     ROLE_VALUES,
     TOOL_CHOICE_TYPE,
     TOOL_CHOICE_VALUES,
+    Function,
     Message,
+    ToolCall,
     ToolChoice,
 )
+from app.tracing import traced, tracer
+from app.transport import RecordingTransport, ReplayMissError, ReplayTransport
 
 
 REASONING_MODELS = ["o1", "o3-mini"]
@@ -54,12 +66,63 @@ class TokenCounter:
     HIGH_DETAIL_TARGET_SHORT_SIDE = 768
     TILE_SIZE = 512
 
+    # Text token cache, shared by all counters and keyed by encoding name + text hash
+    CACHE_MAX_SIZE = 4096
+    _cache: "OrderedDict[str, int]" = OrderedDict()
+    _cache_lock = threading.Lock()
+    cache_hits = 0
+    cache_misses = 0
+
     def __init__(self, tokenizer):
         self.tokenizer = tokenizer
+        # Key for token counts cached on Message objects
+        self.name = getattr(tokenizer, "name", type(tokenizer).__name__)
+
+    def _cache_key(self, text: str) -> str:
+        digest = hashlib.blake2b(
+            text.encode("utf-8", "surrogatepass"), digest_size=16
+        ).hexdigest()
+        return f"{self.name}:{digest}"
 
     def count_text(self, text: str) -> int:
-        """Calculate tokens for a text string"""
-        return 0 if not text else len(self.tokenizer.encode(text))
+        """Calculate tokens for a text string, reusing cached counts for repeated text"""
+        if not text:
+            return 0
+
+        key = self._cache_key(text)
+        with TokenCounter._cache_lock:
+            tokens = TokenCounter._cache.get(key)
+            if tokens is not None:
+                TokenCounter._cache.move_to_end(key)
+                TokenCounter.cache_hits += 1
+                return tokens
+            TokenCounter.cache_misses += 1
+
+        tokens = len(self.tokenizer.encode(text))
+
+        with TokenCounter._cache_lock:
+            TokenCounter._cache[key] = tokens
+            while len(TokenCounter._cache) > self.CACHE_MAX_SIZE:
+                TokenCounter._cache.popitem(last=False)
+        return tokens
+
+    @classmethod
+    def cache_info(cls) -> Dict[str, int]:
+        """Get hit/miss counters and the current size of the text token cache"""
+        return {
+            "hits": TokenCounter.cache_hits,
+            "misses": TokenCounter.cache_misses,
+            "size": len(TokenCounter._cache),
+            "max_size": cls.CACHE_MAX_SIZE,
+        }
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Drop all cached text token counts and reset the counters"""
+        with TokenCounter._cache_lock:
+            TokenCounter._cache.clear()
+            TokenCounter.cache_hits = 0
+            TokenCounter.cache_misses = 0
 
     def count_image(self, image_item: dict) -> int:
         """
@@ -138,7 +201,10 @@ class TokenCounter:
                 if "text" in item:
                     token_count += self.count_text(item["text"])
                 elif "image_url" in item:
-                    token_count += self.count_image(item)
+                    image_url = item["image_url"]
+                    token_count += self.count_image(
+                        image_url if isinstance(image_url, dict) else item
+                    )
         return token_count
 
     def count_tool_calls(self, tool_calls: List[dict]) -> int:
@@ -151,35 +217,84 @@ class TokenCounter:
                 token_count += self.count_text(function.get("arguments", ""))
         return token_count
 
-    def count_message_tokens(self, messages: List[dict]) -> int:
-        """Calculate the total number of tokens in a message list"""
-        total_tokens = self.FORMAT_TOKENS  # Base format tokens
+    def count_tools(self, tools: List[dict]) -> int:
+        """Calculate tokens for tool definitions sent with a request"""
+        return sum(
+            self.count_text(json.dumps(tool, ensure_ascii=False)) for tool in tools
+        )
 
-        for message in messages:
-            tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+    def count_message(self, message: dict, supports_images: bool = False) -> int:
+        """Calculate tokens for a single message dict"""
+        tokens = self.BASE_MESSAGE_TOKENS  # Base tokens per message
+
+        # Add role tokens
+        tokens += self.count_text(message.get("role", ""))
 
-            # Add role tokens
-            tokens += self.count_text(message.get("role", ""))
+        # Add content tokens
+        if "content" in message:
+            tokens += self.count_content(message["content"])
 
-            # Add content tokens
-            if "content" in message:
-                tokens += self.count_content(message["content"])
+        # Add tool calls tokens
+        if "tool_calls" in message:
+            tokens += self.count_tool_calls(message["tool_calls"])
 
-            # Add tool calls tokens
-            if "tool_calls" in message:
-                tokens += self.count_tool_calls(message["tool_calls"])
+        # Add name and tool_call_id tokens
+        tokens += self.count_text(message.get("name", ""))
+        tokens += self.count_text(message.get("tool_call_id", ""))
 
-            # Add name and tool_call_id tokens
-            tokens += self.count_text(message.get("name", ""))
-            tokens += self.count_text(message.get("tool_call_id", ""))
+        # Add tokens for an image that has not been moved into content yet
+        if supports_images and message.get("base64_image"):
+            tokens += self.count_image({"image_url": {}})
 
-            total_tokens += tokens
+        return tokens
+
+    def count_cached_message(
+        self, message: Message, supports_images: bool = False
+    ) -> int:
+        """
+        Calculate tokens for a Message, encoding it only the first time.
+
+        The text token count is stored on the message keyed by tokenizer name,
+        so a message kept in memory is never re-encoded on later requests.
+        Image tokens do not need the tokenizer and are added on every call.
+        """
+        has_image = supports_images and bool(message.base64_image)
+        if message.content is None and message.tool_calls is None and not has_image:
+            # Skipped by LLM.format_messages, so it is never sent
+            return 0
+
+        tokens = message.get_token_count(self.name)
+        if tokens is None:
+            tokens = self.count_message(message.to_formatted_dict())
+            message.set_token_count(self.name, tokens)
+
+        if has_image:
+            tokens += self.count_image({"detail": message.image_detail or "medium"})
+        return tokens
+
+    def count_message_tokens(
+        self, messages: List[Union[dict, Message]], supports_images: bool = False
+    ) -> int:
+        """Calculate the total number of tokens in a message list"""
+        total_tokens = self.FORMAT_TOKENS  # Base format tokens
+
+        for message in messages:
+            if isinstance(message, Message):
+                total_tokens += self.count_cached_message(message, supports_images)
+            else:
+                total_tokens += self.count_message(message, supports_images)
 
         return total_tokens
 
 
 class LLM:
     _instances: Dict[str, "LLM"] = {}
+    # API clients shared by all instances, keyed by (api_type, base_url, api_key, api_version)
+    _clients: Dict[Tuple[str, str, str, str], Any] = {}
+    # Response cache shared by all instances, created on first use when enabled
+    _response_cache: Optional[TTLCache] = None
+    # Replay transport shared by all instances when replaying a recording
+    _replay_transport: Optional[ReplayTransport] = None
 
     def __new__(
         cls, config_name: str = "default", llm_config: Optional[LLMSettings] = None
@@ -220,27 +335,130 @@ class LLM:
                 # If the model is not in tiktoken's presets, use cl100k_base as default
                 self.tokenizer = tiktoken.get_encoding("cl100k_base")
 
-            if self.api_type == "azure":
-                self.client = AsyncAzureOpenAI(
-                    base_url=self.base_url,
-                    api_key=self.api_key,
-                    api_version=self.api_version,
+            self.client = self._get_transport(llm_config)
+
+            self.token_counter = TokenCounter(self.tokenizer)
+            self.response_cache = self._get_response_cache()
+
+    @classmethod
+    def _get_client(cls, llm_config: LLMSettings) -> Any:
+        """
+        Get the API client for an endpoint, creating it on first use.
+
+        Configs that point at the same endpoint with the same credentials share
+        one client and therefore one HTTP connection pool, so warm connections
+        are reused across agents. Pool limits come from the first config that
+        creates the client.
+        """
+        key = (
+            llm_config.api_type,
+            llm_config.base_url,
+            llm_config.api_key,
+            llm_config.api_version,
+        )
+        if key in cls._clients:
+            return cls._clients[key]
+
+        if llm_config.api_type == "aws":
+            client = BedrockClient()
+        else:
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=llm_config.max_connections,
+                    max_keepalive_connections=llm_config.max_keepalive_connections,
+                    keepalive_expiry=llm_config.keepalive_expiry,
+                )
+            )
+            if llm_config.api_type == "azure":
+                client = AsyncAzureOpenAI(
+                    base_url=llm_config.base_url,
+                    api_key=llm_config.api_key,
+                    api_version=llm_config.api_version,
+                    http_client=http_client,
                 )
-            elif self.api_type == "aws":
-                self.client = BedrockClient()
             else:
-                self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+                client = AsyncOpenAI(
+                    api_key=llm_config.api_key,
+                    base_url=llm_config.base_url,
+                    http_client=http_client,
+                )
 
-            self.token_counter = TokenCounter(self.tokenizer)
+        cls._clients[key] = client
+        return client
+
+    @classmethod
+    def _get_transport(cls, llm_config: LLMSettings) -> Any:
+        """
+        Get the client requests are sent through.
+
+        This is the API client itself unless `[llm_transport]` is configured, in
+        which case requests are recorded to a file or replayed from it. Replay
+        never creates an API client, so it works without credentials or network.
+        """
+        settings = config.llm_transport
+        if not settings or not settings.mode:
+            return cls._get_client(llm_config)
+
+        path = config.root_path / settings.path
+        if settings.mode == "replay":
+            if cls._replay_transport is None:
+                cls._replay_transport = ReplayTransport(
+                    path, settings.latency_scale, settings.strict
+                )
+            return cls._replay_transport
+        return RecordingTransport(cls._get_client(llm_config), path)
+
+    @classmethod
+    def _get_response_cache(cls) -> Optional[TTLCache]:
+        """Get the shared response cache, or None if caching is disabled"""
+        settings = config.response_cache
+        if not settings or not settings.enabled:
+            return None
+        if cls._response_cache is None:
+            cls._response_cache = TTLCache(
+                max_entries=settings.max_entries,
+                ttl=settings.ttl,
+                directory=(
+                    config.root_path / settings.directory
+                    if settings.directory
+                    else None
+                ),
+            )
+        return cls._response_cache
+
+    def _response_cache_key(self, params: dict) -> Optional[str]:
+        """
+        Get the response cache key for a request, or None if it can't be cached.
+
+        Only deterministic requests are eligible: temperature 0 on a model that
+        honours it. Streaming and timeout settings don't change the response,
+        so they are left out of the key.
+        """
+        if self.response_cache is None or params.get("temperature") != 0:
+            return None
+        request = {k: v for k, v in params.items() if k not in ("stream", "timeout")}
+        return self.response_cache.make_key({"base_url": self.base_url, **request})
+
+    def _get_cached_response(self, key: Optional[str]) -> Optional[dict]:
+        if key is None:
+            return None
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            logger.info(f"Using cached response from {self.model}")
+        return cached
+
+    def _cache_response(self, key: Optional[str], value: dict) -> None:
+        if key is not None:
+            self.response_cache.set(key, value)
 
     def count_tokens(self, text: str) -> int:
         """Calculate the number of tokens in a text"""
-        if not text:
-            return 0
-        return len(self.tokenizer.encode(text))
+        return self.token_counter.count_text(text)
 
-    def count_message_tokens(self, messages: List[dict]) -> int:
-        return self.token_counter.count_message_tokens(messages)
+    def count_message_tokens(
+        self, messages: List[Union[dict, Message]], supports_images: bool = False
+    ) -> int:
+        return self.token_counter.count_message_tokens(messages, supports_images)
 
     def update_token_count(self, input_tokens: int, completion_tokens: int = 0) -> None:
         """Update token counts"""
@@ -299,9 +517,9 @@ class LLM:
         formatted_messages = []
 
         for message in messages:
-            # Convert Message objects to dictionaries
+            # Message objects keep their formatted dict, so only build it once
             if isinstance(message, Message):
-                message = message.to_dict()
+                message = message.to_formatted_dict(supports_images)
 
             if isinstance(message, dict):
                 # If message is a dict, ensure it has required fields
@@ -361,10 +579,12 @@ class LLM:
     @retry(
         wait=wait_random_exponential(min=1, max=60),
         stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
+        retry=(
+            retry_if_exception_type((OpenAIError, Exception, ValueError))
+            & retry_if_not_exception_type(ReplayMissError)
+        ),  # Don't retry TokenLimitExceeded or a request missing from the replay
     )
+    @traced("llm.ask")
     async def ask(
         self,
         messages: List[Union[dict, Message]],
@@ -394,6 +614,11 @@ class LLM:
             # Check if the model supports images
             supports_images = self.model in MULTIMODAL_MODELS
 
+            # Calculate input token count, reusing counts cached on Message objects
+            input_tokens = self.count_message_tokens(
+                (system_msgs or []) + messages, supports_images
+            )
+
             # Format system and user messages with image support check
             if system_msgs:
                 system_msgs = self.format_messages(system_msgs, supports_images)
@@ -401,15 +626,17 @@ class LLM:
             else:
                 messages = self.format_messages(messages, supports_images)
 
-            # Calculate input token count
-            input_tokens = self.count_message_tokens(messages)
-
             # Check if token limits are exceeded
             if not self.check_token_limit(input_tokens):
                 error_message = self.get_limit_error_message(input_tokens)
                 # Raise a special exception that won't be retried
                 raise TokenLimitExceeded(error_message)
 
+            span = tracer.current_span()
+            span.set_attributes(
+                {"llm.model": self.model, "llm.input_tokens": input_tokens}
+            )
+
             params = {
                 "model": self.model,
                 "messages": messages,
@@ -423,6 +650,12 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
+            cache_key = self._response_cache_key(params)
+            cached = self._get_cached_response(cache_key)
+            if cached is not None:
+                span.set_attribute("llm.cached", True)
+                return cached["content"]
+
             if not stream:
                 # Non-streaming request
                 response = await self.client.chat.completions.create(
@@ -436,8 +669,16 @@ class LLM:
                 self.update_token_count(
                     response.usage.prompt_tokens, response.usage.completion_tokens
                 )
+                span.set_attribute(
+                    "llm.completion_tokens", response.usage.completion_tokens
+                )
 
-                return response.choices[0].message.content
+                content = response.choices[0].message.content
+                self._cache_response(
+                    cache_key,
+                    {"content": content, "usage": response.usage.model_dump()},
+                )
+                return content
 
             # Streaming request, For streaming, update estimated token count before making the request
             self.update_token_count(input_tokens)
@@ -447,6 +688,8 @@ class LLM:
             collected_messages = []
             completion_text = ""
             async for chunk in response:
+                if not collected_messages:
+                    span.set_attribute("llm.time_to_first_token_ms", span.elapsed_ms())
                 chunk_message = chunk.choices[0].delta.content or ""
                 collected_messages.append(chunk_message)
                 completion_text += chunk_message
@@ -463,7 +706,9 @@ class LLM:
                 f"Estimated completion tokens for streaming response: {completion_tokens}"
             )
             self.total_completion_tokens += completion_tokens
+            span.set_attribute("llm.completion_tokens", completion_tokens)
 
+            self._cache_response(cache_key, {"content": full_response, "usage": None})
             return full_response
 
         except TokenLimitExceeded:
@@ -488,10 +733,12 @@ class LLM:
     @retry(
         wait=wait_random_exponential(min=1, max=60),
         stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
+        retry=(
+            retry_if_exception_type((OpenAIError, Exception, ValueError))
+            & retry_if_not_exception_type(ReplayMissError)
+        ),  # Don't retry TokenLimitExceeded or a request missing from the replay
     )
+    @traced("llm.ask_with_images")
     async def ask_with_images(
         self,
         messages: List[Union[dict, Message]],
@@ -536,15 +783,16 @@ class LLM:
                     "The last message must be from the user to attach images"
                 )
 
-            # Process the last user message to include images
-            last_message = formatted_messages[-1]
+            # Process a copy of the last user message to include images, as
+            # formatted Message dicts are cached and shared between requests
+            last_message = formatted_messages[-1] = dict(formatted_messages[-1])
 
             # Convert content to multimodal format if needed
             content = last_message["content"]
             multimodal_content = (
                 [{"type": "text", "text": content}]
                 if isinstance(content, str)
-                else content
+                else list(content)
                 if isinstance(content, list)
                 else []
             )
@@ -576,6 +824,14 @@ class LLM:
 
             # Calculate tokens and check limits
             input_tokens = self.count_message_tokens(all_messages)
+            span = tracer.current_span()
+            span.set_attributes(
+                {
+                    "llm.model": self.model,
+                    "llm.input_tokens": input_tokens,
+                    "llm.stream": stream,
+                }
+            )
             if not self.check_token_limit(input_tokens):
                 raise TokenLimitExceeded(self.get_limit_error_message(input_tokens))
 
@@ -603,6 +859,9 @@ class LLM:
                     raise ValueError("Empty or invalid response from LLM")
 
                 self.update_token_count(response.usage.prompt_tokens)
+                span.set_attribute(
+                    "llm.completion_tokens", response.usage.completion_tokens
+                )
                 return response.choices[0].message.content
 
             # Handle streaming request
@@ -611,6 +870,8 @@ class LLM:
 
             collected_messages = []
             async for chunk in response:
+                if not collected_messages:
+                    span.set_attribute("llm.time_to_first_token_ms", span.elapsed_ms())
                 chunk_message = chunk.choices[0].delta.content or ""
                 collected_messages.append(chunk_message)
                 print(chunk_message, end="", flush=True)
@@ -644,10 +905,12 @@ class LLM:
     @retry(
         wait=wait_random_exponential(min=1, max=60),
         stop=stop_after_attempt(6),
-        retry=retry_if_exception_type(
-            (OpenAIError, Exception, ValueError)
-        ),  # Don't retry TokenLimitExceeded
+        retry=(
+            retry_if_exception_type((OpenAIError, Exception, ValueError))
+            & retry_if_not_exception_type(ReplayMissError)
+        ),  # Don't retry TokenLimitExceeded or a request missing from the replay
     )
+    @traced("llm.ask_tool")
     async def ask_tool(
         self,
         messages: List[Union[dict, Message]],
@@ -656,6 +919,9 @@ class LLM:
         tools: Optional[List[dict]] = None,
         tool_choice: TOOL_CHOICE_TYPE = ToolChoice.AUTO,  # type: ignore
         temperature: Optional[float] = None,
+        tools_tokens: Optional[int] = None,
+        stream: bool = False,
+        on_tool_call: Optional[Callable[[ToolCall], Any]] = None,
         **kwargs,
     ) -> ChatCompletionMessage | None:
         """
@@ -668,6 +934,11 @@ class LLM:
             tools: List of tools to use
             tool_choice: Tool choice strategy
             temperature: Sampling temperature for the response
+            tools_tokens: Precomputed token cost of tools (see ToolCollection.count_tokens)
+            stream: Whether to stream the response and assemble tool calls from deltas
+            on_tool_call: Called with each tool call as soon as its arguments are
+                complete, while the rest of a streamed response is still arriving.
+                It may be called again for new tool calls if the request is retried.
             **kwargs: Additional completion arguments
 
         Returns:
@@ -687,6 +958,11 @@ class LLM:
             # Check if the model supports images
             supports_images = self.model in MULTIMODAL_MODELS
 
+            # Calculate input token count, reusing counts cached on Message objects
+            input_tokens = self.count_message_tokens(
+                (system_msgs or []) + messages, supports_images
+            )
+
             # Format messages
             if system_msgs:
                 system_msgs = self.format_messages(system_msgs, supports_images)
@@ -694,16 +970,19 @@ class LLM:
             else:
                 messages = self.format_messages(messages, supports_images)
 
-            # Calculate input token count
-            input_tokens = self.count_message_tokens(messages)
-
             # If there are tools, calculate token count for tool descriptions
-            tools_tokens = 0
-            if tools:
-                for tool in tools:
-                    tools_tokens += self.count_tokens(str(tool))
-
-            input_tokens += tools_tokens
+            if tools and tools_tokens is None:
+                tools_tokens = self.token_counter.count_tools(tools)
+
+            input_tokens += tools_tokens or 0
+            span = tracer.current_span()
+            span.set_attributes(
+                {
+                    "llm.model": self.model,
+                    "llm.input_tokens": input_tokens,
+                    "llm.stream": stream,
+                }
+            )
 
             # Check if token limits are exceeded
             if not self.check_token_limit(input_tokens):
@@ -735,7 +1014,26 @@ class LLM:
                     temperature if temperature is not None else self.temperature
                 )
 
-            params["stream"] = False  # Always use non-streaming for tool requests
+            cache_key = self._response_cache_key(params)
+            cached = self._get_cached_response(cache_key)
+            if cached is not None:
+                span.set_attribute("llm.cached", True)
+                message = ChatCompletionMessage.model_validate(cached["message"])
+                if on_tool_call:
+                    for tool_call in message.tool_calls or []:
+                        on_tool_call(ToolCall.model_validate(tool_call.model_dump()))
+                return message
+
+            if stream:
+                message = await self._stream_tool_response(
+                    params, input_tokens, on_tool_call
+                )
+                self._cache_response(
+                    cache_key, {"message": message.model_dump(), "usage": None}
+                )
+                return message
+
+            params["stream"] = False
             response: ChatCompletion = await self.client.chat.completions.create(
                 **params
             )
@@ -750,8 +1048,16 @@ class LLM:
             self.update_token_count(
                 response.usage.prompt_tokens, response.usage.completion_tokens
             )
+            span.set_attribute(
+                "llm.completion_tokens", response.usage.completion_tokens
+            )
 
-            return response.choices[0].message
+            message = response.choices[0].message
+            self._cache_response(
+                cache_key,
+                {"message": message.model_dump(), "usage": response.usage.model_dump()},
+            )
+            return message
 
         except TokenLimitExceeded:
             # Re-raise token limit errors without logging
@@ -771,3 +1077,100 @@ class LLM:
         except Exception as e:
             logger.error(f"Unexpected error in ask_tool: {e}")
             raise
+
+    async def _stream_tool_response(
+        self,
+        params: dict,
+        input_tokens: int,
+        on_tool_call: Optional[Callable[[ToolCall], Any]] = None,
+    ) -> ChatCompletionMessage:
+        """
+        Stream a tool request and assemble the response message from deltas.
+
+        Tool calls are handed to on_tool_call in order, each as soon as its
+        arguments form a complete JSON object or a later call starts.
+        """
+        # Usage is not reported for streams, so track the estimate up front
+        self.update_token_count(input_tokens)
+        response = await self.client.chat.completions.create(**params, stream=True)
+
+        span = tracer.current_span()
+        first_chunk = True
+        content_parts: List[str] = []
+        calls: Dict[int, dict] = {}
+        dispatched = set()
+
+        def dispatch(index: int) -> None:
+            if index in dispatched:
+                return
+            dispatched.add(index)
+            if on_tool_call:
+                on_tool_call(self._build_tool_call(calls[index]))
+
+        async for chunk in response:
+            if not chunk.choices:
+                continue
+            if first_chunk:
+                span.set_attribute("llm.time_to_first_token_ms", span.elapsed_ms())
+                first_chunk = False
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content_parts.append(delta.content)
+
+            for delta_call in delta.tool_calls or []:
+                # A new call index means every earlier call is complete
+                for index in sorted(calls):
+                    if index < delta_call.index:
+                        dispatch(index)
+
+                call = calls.setdefault(
+                    delta_call.index, {"id": "", "name": "", "arguments": ""}
+                )
+                if delta_call.id:
+                    call["id"] = delta_call.id
+                if delta_call.function:
+                    call["name"] += delta_call.function.name or ""
+                    if delta_call.function.arguments:
+                        call["arguments"] += delta_call.function.arguments
+                        if self._is_complete_arguments(call["arguments"]):
+                            dispatch(delta_call.index)
+
+        for index in sorted(calls):
+            dispatch(index)
+
+        content = "".join(content_parts)
+        completion_tokens = self.count_tokens(content) + sum(
+            self.count_tokens(call["name"]) + self.count_tokens(call["arguments"])
+            for call in calls.values()
+        )
+        self.total_completion_tokens += completion_tokens
+        span.set_attribute("llm.completion_tokens", completion_tokens)
+
+        return ChatCompletionMessage.model_validate(
+            {
+                "role": "assistant",
+                "content": content or None,
+                "tool_calls": [
+                    self._build_tool_call(calls[index]).model_dump()
+                    for index in sorted(calls)
+                ]
+                or None,
+            }
+        )
+
+    @staticmethod
+    def _build_tool_call(call: dict) -> ToolCall:
+        return ToolCall(
+            id=call["id"],
+            function=Function(name=call["name"], arguments=call["arguments"]),
+        )
+
+    @staticmethod
+    def _is_complete_arguments(arguments: str) -> bool:
+        """Check whether streamed arguments already form a complete JSON object"""
+        if not arguments.rstrip().endswith("}"):
+            return False
+        try:
+            return isinstance(json.loads(arguments), dict)
+        except json.JSONDecodeError:
+            return False
@@ -1,9 +1,10 @@
+import hashlib
 import sys
 from datetime import datetime
 
 from loguru import logger as _logger
 
-from app.config import PROJECT_ROOT
+from app.config import PROJECT_ROOT, config
 
 
 _print_level = "INFO"
@@ -20,12 +21,36 @@ def define_log_level(print_level="INFO", logfile_level="DEBUG", name: str = None
         f"{name}_{formatted_date}" if name else formatted_date
     )  # name a log with prefix name
 
+    settings = config.logging
+    # With enqueue, records are written by a background thread, so slow disks
+    # and large records don't block the event loop
+    file_options = {
+        "enqueue": settings.enqueue,
+        "rotation": settings.rotation,
+        "retention": settings.retention,
+        "compression": settings.compression,
+    }
+    if settings.buffer_size:
+        # Collect output and write it in batches rather than line by line
+        file_options["buffering"] = settings.buffer_size
+
     _logger.remove()
-    _logger.add(sys.stderr, level=print_level)
-    _logger.add(PROJECT_ROOT / f"logs/{log_name}.log", level=logfile_level)
+    _logger.add(sys.stderr, level=print_level, enqueue=settings.enqueue)
+    _logger.add(
+        PROJECT_ROOT / f"logs/{log_name}.log", level=logfile_level, **file_options
+    )
     return _logger
 
 
+def digest(text: str) -> str:
+    """Shorten text to its length and hash if it exceeds the configured threshold"""
+    threshold = config.logging.result_digest_threshold
+    if threshold is None or len(text) <= threshold:
+        return text
+    text_hash = hashlib.sha1(text.encode("utf-8", "surrogatepass")).hexdigest()
+    return f"<{len(text)} characters, sha1 {text_hash[:12]}>"
+
+
 logger = define_log_level()
 
 
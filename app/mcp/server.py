@@ -13,7 +13,7 @@ from typing import Any, Dict, Optional
 
 from mcp.server.fastmcp import FastMCP
 
-from app.logger import logger
+from app.logger import digest, logger
 from app.tool.base import BaseTool
 from app.tool.bash import Bash
 from app.tool.browser_use_tool import BrowserUseTool
@@ -45,7 +45,7 @@ class MCPServer:
             logger.info(f"Executing {tool_name}: {kwargs}")
             result = await tool.execute(**kwargs)
 
-            logger.info(f"Result of {tool_name}: {result}")
+            logger.info(f"Result of {tool_name}: {digest(str(result))}")
 
             # Handle different types of results (match original logic)
             if hasattr(result, "model_dump"):
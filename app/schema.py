@@ -1,7 +1,21 @@
+import base64
+import io
+from collections import Counter, deque
 from enum import Enum
-from typing import Any, List, Literal, Optional, Union
+from itertools import islice
+from typing import Any, List, Literal, Optional, Tuple, Union
 
-from pydantic import BaseModel, Field
+from PIL import Image
+from pydantic import (
+    BaseModel,
+    Field,
+    PrivateAttr,
+    field_serializer,
+    field_validator,
+    model_validator,
+)
+
+from app.config import ImageRetentionSettings, MemoryCompactionSettings
 
 
 class Role(str, Enum):
@@ -60,6 +74,38 @@ class Message(BaseModel):
     name: Optional[str] = Field(default=None)
     tool_call_id: Optional[str] = Field(default=None)
     base64_image: Optional[str] = Field(default=None)
+    # OpenAI image detail level ("low", "high" or "auto"); None leaves it to the API
+    image_detail: Optional[str] = Field(default=None)
+
+    # Lazily filled caches: token counts keyed by tokenizer name and
+    # OpenAI-format dicts keyed by image support. Plain slots rather than
+    # pydantic private attributes, which would double the construction cost.
+    __slots__ = ("_token_counts", "_formatted")
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # Any change to a field makes the cached token counts and dicts stale
+        if name in self.model_fields:
+            self._set_cache("_token_counts", None)
+            self._set_cache("_formatted", None)
+
+    def _get_cache(self, name: str) -> dict:
+        cache = getattr(self, name, None)
+        if cache is None:
+            cache = {}
+            self._set_cache(name, cache)
+        return cache
+
+    def _set_cache(self, name: str, cache: Optional[dict]) -> None:
+        object.__setattr__(self, name, cache)
+
+    def get_token_count(self, tokenizer_name: str) -> Optional[int]:
+        """Get the cached token count of this message for a tokenizer"""
+        return self._get_cache("_token_counts").get(tokenizer_name)
+
+    def set_token_count(self, tokenizer_name: str, tokens: int) -> None:
+        """Cache the token count of this message for a tokenizer"""
+        self._get_cache("_token_counts")[tokenizer_name] = tokens
 
     def __add__(self, other) -> List["Message"]:
         """支持 Message + list 或 Message + Message 的操作"""
@@ -87,7 +133,17 @@ class Message(BaseModel):
         if self.content is not None:
             message["content"] = self.content
         if self.tool_calls is not None:
-            message["tool_calls"] = [tool_call.dict() for tool_call in self.tool_calls]
+            message["tool_calls"] = [
+                {
+                    "id": tool_call.id,
+                    "type": tool_call.type,
+                    "function": {
+                        "name": tool_call.function.name,
+                        "arguments": tool_call.function.arguments,
+                    },
+                }
+                for tool_call in self.tool_calls
+            ]
         if self.name is not None:
             message["name"] = self.name
         if self.tool_call_id is not None:
@@ -96,6 +152,47 @@ class Message(BaseModel):
             message["base64_image"] = self.base64_image
         return message
 
+    def to_formatted_dict(self, supports_images: bool = False) -> dict:
+        """
+        Convert message to OpenAI format, building it only the first time.
+
+        With image support the image becomes a content part holding the data
+        URL; otherwise it is dropped. The dict is cached until a field changes
+        and shared by every request, so callers must not modify it.
+        """
+        cache = self._get_cache("_formatted")
+        formatted = cache.get(supports_images)
+        if formatted is None:
+            formatted = self.to_dict()
+            formatted.pop("base64_image", None)
+            if supports_images and self.base64_image:
+                text = formatted.get("content")
+                image_url = {"url": f"data:image/jpeg;base64,{self.base64_image}"}
+                if self.image_detail:
+                    image_url["detail"] = self.image_detail
+                formatted["content"] = (
+                    [{"type": "text", "text": text}] if text else []
+                ) + [{"type": "image_url", "image_url": image_url}]
+            cache[supports_images] = formatted
+        return formatted
+
+    def downscale_image(self, max_size: int, quality: int) -> None:
+        """
+        Replace the image with a smaller JPEG to be sent at low detail.
+
+        Images that can't be decoded are dropped instead.
+        """
+        try:
+            image = Image.open(io.BytesIO(base64.b64decode(self.base64_image)))
+            image.thumbnail((max_size, max_size))
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, format="JPEG", quality=quality)
+        except (OSError, ValueError):
+            self.base64_image = None
+            return
+        self.base64_image = base64.b64encode(buffer.getvalue()).decode("utf-8")
+        self.image_detail = "low"
+
     @classmethod
     def user_message(
         cls, content: str, base64_image: Optional[str] = None
@@ -144,7 +241,16 @@ class Message(BaseModel):
             base64_image: Optional base64 encoded image
         """
         formatted_calls = [
-            {"id": call.id, "function": call.function.model_dump(), "type": "function"}
+            (
+                call
+                if isinstance(call, ToolCall)
+                else ToolCall(
+                    id=call.id,
+                    function=Function(
+                        name=call.function.name, arguments=call.function.arguments
+                    ),
+                )
+            )
             for call in tool_calls
         ]
         return cls(
@@ -156,27 +262,300 @@ class Message(BaseModel):
         )
 
 
+class MessageBuffer(deque):
+    """
+    Bounded deque of messages that also supports list-style slicing.
+
+    Appending evicts the oldest message in O(1) once maxlen is reached. Slices
+    return new lists and only walk the requested part, from whichever end is
+    closer, so taking the most recent messages doesn't touch the whole buffer.
+    """
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return super().__getitem__(index)
+
+        start, stop, step = index.indices(len(self))
+        if step < 0:
+            return list(self)[index]
+        if start >= len(self) - stop:
+            # Closer to the end, so walk backwards from it
+            items = list(islice(reversed(self), len(self) - stop, len(self) - start))
+            return items[::-1][::step]
+        return list(islice(self, start, stop, step))
+
+    def __add__(self, other):
+        if isinstance(other, list):
+            return list(self) + other
+        return super().__add__(other)
+
+    def __radd__(self, other):
+        if isinstance(other, list):
+            return other + list(self)
+        return NotImplemented
+
+
 class Memory(BaseModel):
-    messages: List[Message] = Field(default_factory=list)
+    messages: MessageBuffer = Field(default_factory=MessageBuffer)
     max_messages: int = Field(default=100)
+    # Counter used to tokenize messages as they are added (see app.llm.TokenCounter)
+    token_counter: Optional[Any] = Field(default=None, exclude=True)
+    # Limits how many images stay at full detail; everything is kept if unset
+    image_retention: Optional[ImageRetentionSettings] = Field(
+        default=None, exclude=True
+    )
+    # Keeps memory within a token budget; requires token_counter
+    compaction: Optional[MemoryCompactionSettings] = Field(default=None, exclude=True)
+
+    # Note standing in for messages dropped by compaction
+    _compaction_note: Optional[Message] = PrivateAttr(default=None)
+    _dropped_messages: int = PrivateAttr(default=0)
+    # How often each assistant content and tool call signature occurs in messages
+    _fingerprints: Counter = PrivateAttr(default_factory=Counter)
+    _last_assistant: Optional[Message] = PrivateAttr(default=None)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @field_validator("messages", mode="before")
+    @classmethod
+    def _to_buffer(cls, messages: Any) -> MessageBuffer:
+        if isinstance(messages, MessageBuffer):
+            return messages
+        # Dumped memories hold plain dicts
+        return MessageBuffer(
+            message if isinstance(message, Message) else Message.model_validate(message)
+            for message in messages
+        )
+
+    @field_serializer("messages")
+    def _dump_messages(self, messages: MessageBuffer) -> List[Message]:
+        return list(messages)
+
+    @model_validator(mode="after")
+    def _bound_buffer(self) -> "Memory":
+        self.messages = self.messages
+        return self
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        # Keep messages in a buffer bounded by max_messages, whatever is assigned
+        if name == "messages":
+            value = self._bounded(value, self.max_messages)
+        elif name == "max_messages":
+            self.__dict__["messages"] = self._bounded(self.messages, value)
+        super().__setattr__(name, value)
+        if name in ("messages", "max_messages"):
+            self._reindex()
+
+    @classmethod
+    def _bounded(cls, messages: Any, max_messages: int) -> MessageBuffer:
+        messages = list(messages)
+        buffer = MessageBuffer(messages, maxlen=max_messages)
+        if len(messages) > max_messages:
+            cls._drop_orphans(buffer)
+        return buffer
 
     def add_message(self, message: Message) -> None:
         """Add a message to memory"""
-        self.messages.append(message)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        self.add_messages([message])
 
     def add_messages(self, messages: List[Message]) -> None:
         """Add multiple messages to memory"""
+        # The buffer evicts the oldest messages once max_messages is reached
+        stored = len(self.messages)
+        overflow = stored + len(messages) - self.max_messages
+        evicting = overflow > 0
+        for message in islice(self.messages, max(0, overflow)):
+            self._unindex(message)
         self.messages.extend(messages)
-        # Optional: Implement message limit
-        if len(self.messages) > self.max_messages:
-            self.messages = self.messages[-self.max_messages :]
+        for message in messages[max(0, overflow - stored) :]:
+            self._index(message)
+        if self.token_counter:
+            for message in messages:
+                self.token_counter.count_cached_message(message)
+        if any(message.base64_image for message in messages):
+            self.retain_images()
+        self.compact()
+        if evicting:
+            self._drop_orphans(self.messages)
+
+    @staticmethod
+    def _fingerprint(message: Message) -> List[Tuple[str, int]]:
+        """Hashes identifying an assistant message's content and its tool calls"""
+        if message.role != Role.ASSISTANT:
+            return []
+        keys = []
+        if message.content:
+            keys.append(("content", hash(message.content)))
+        if message.tool_calls:
+            signature = tuple(
+                (call.function.name, call.function.arguments)
+                for call in message.tool_calls
+            )
+            keys.append(("tool_calls", hash(signature)))
+        return keys
+
+    def _index(self, message: Message) -> None:
+        keys = self._fingerprint(message)
+        if keys:
+            self._fingerprints.update(keys)
+            self._last_assistant = message
+
+    def _unindex(self, message: Message) -> None:
+        for key in self._fingerprint(message):
+            if self._fingerprints[key] > 1:
+                self._fingerprints[key] -= 1
+            else:
+                self._fingerprints.pop(key, None)
+        if message is self._last_assistant:
+            self._last_assistant = None
+
+    def _reindex(self) -> None:
+        self._fingerprints = Counter()
+        self._last_assistant = None
+        for message in self.messages:
+            self._index(message)
+
+    def repeat_count(self) -> int:
+        """
+        Count earlier assistant messages repeating the latest one.
+
+        A message counts as a repeat if it has the same content or calls the
+        same tools with the same arguments. Fingerprints are kept up to date
+        as messages are added, so this does not scan memory.
+        """
+        if self._last_assistant is None:
+            return 0
+        return max(
+            (
+                self._fingerprints[key] - 1
+                for key in self._fingerprint(self._last_assistant)
+            ),
+            default=0,
+        )
+
+    @staticmethod
+    def _drop_orphans(messages: MessageBuffer) -> None:
+        """Drop leading tool results whose tool call was evicted"""
+        while messages and messages[0].role == Role.TOOL:
+            messages.popleft()
+
+    def compact(self) -> None:
+        """
+        Shrink memory until it fits the token budget.
+
+        Older tool results are shortened first, as they usually hold most of
+        the tokens. If that is not enough, the oldest messages are dropped and
+        replaced by a single note. An assistant message is always dropped
+        together with its tool results, and system messages, the first user
+        message and the `keep_recent` most recent messages are never touched.
+        Token counts come from the per-message cache, so this only encodes the
+        messages it shortens.
+        """
+        settings = self.compaction
+        if not settings or settings.token_budget is None or not self.token_counter:
+            return
+
+        budget = settings.token_budget
+        total = self.count_tokens()
+        if total <= budget:
+            return
+
+        # Never start the protected tail in the middle of a tool exchange
+        tail = max(0, len(self.messages) - settings.keep_recent)
+        while 0 < tail < len(self.messages) and self.messages[tail].role == Role.TOOL:
+            tail -= 1
+
+        max_chars = settings.observation_max_chars
+        for message in self.messages[:tail]:
+            if total <= budget:
+                return
+            content = message.content or ""
+            if message.role == Role.TOOL and len(content) > max_chars:
+                before = self.token_counter.count_cached_message(message)
+                note = f"\n... [truncated from {len(content)} characters]"
+                message.content = content[: max(0, max_chars - len(note))] + note
+                total += self.token_counter.count_cached_message(message) - before
+
+        first_user = next(
+            (
+                m
+                for m in self.messages
+                if m.role == Role.USER and m is not self._compaction_note
+            ),
+            None,
+        )
+        dropped = set()
+        index = 0
+        while index < tail and total > budget:
+            message = self.messages[index]
+            # An assistant message and its tool results go together
+            end = index + 1
+            while end < tail and self.messages[end].role == Role.TOOL:
+                end += 1
+            if message.role != Role.SYSTEM and message is not first_user:
+                for dropped_message in self.messages[index:end]:
+                    if dropped_message is self._compaction_note:
+                        continue
+                    dropped.add(id(dropped_message))
+                    total -= self.token_counter.count_cached_message(dropped_message)
+            index = end
+
+        if not dropped:
+            return
+
+        self._dropped_messages += len(dropped)
+        messages = [
+            m
+            for m in self.messages
+            if id(m) not in dropped and m is not self._compaction_note
+        ]
+        self._compaction_note = Message.user_message(
+            f"[{self._dropped_messages} earlier messages were removed to stay "
+            "within the token budget]"
+        )
+        # The note takes the place of the oldest dropped messages
+        position = next(
+            (
+                i
+                for i, m in enumerate(messages)
+                if m.role != Role.SYSTEM and m is not first_user
+            ),
+            len(messages),
+        )
+        messages.insert(position, self._compaction_note)
+        self.messages = messages
+
+    def retain_images(self) -> None:
+        """Downscale or drop images older than the most recent full-detail ones"""
+        retention = self.image_retention
+        if not retention or retention.keep_full is None:
+            return
+
+        full_images = 0
+        for message in reversed(self.messages):
+            if not message.base64_image or message.image_detail == "low":
+                continue
+            if full_images < retention.keep_full:
+                full_images += 1
+            elif retention.older == "drop":
+                message.base64_image = None
+            else:
+                message.downscale_image(retention.low_max_size, retention.low_quality)
 
     def clear(self) -> None:
         """Clear all messages"""
         self.messages.clear()
+        self._fingerprints.clear()
+        self._last_assistant = None
+        self._compaction_note = None
+        self._dropped_messages = 0
+
+    def count_tokens(self) -> int:
+        """Sum the cached token counts of all messages in memory"""
+        if not self.token_counter:
+            return 0
+        return self.token_counter.count_message_tokens(self.messages)
 
     def get_recent_messages(self, n: int) -> List[Message]:
         """Get n most recent messages"""
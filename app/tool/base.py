@@ -8,6 +8,8 @@ class BaseTool(ABC, BaseModel):
     name: str
     description: str
     parameters: Optional[dict] = None
+    # Whether calls may run concurrently with other parallel-safe calls
+    parallel_safe: bool = True
 
     class Config:
         arbitrary_types_allowed = True
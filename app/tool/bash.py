@@ -128,6 +128,8 @@ class Bash(BaseTool):
         },
         "required": ["command"],
     }
+    # All calls share one shell session
+    parallel_safe: bool = False
 
     _session: Optional[_BashSession] = None
 
@@ -11,6 +11,7 @@ from pydantic import Field, field_validator
 from pydantic_core.core_schema import ValidationInfo
 
 from app.config import config
+from app.extraction import HTMLExtractor
 from app.llm import LLM
 from app.tool.base import BaseTool, ToolResult
 from app.tool.web_search import WebSearch
@@ -120,6 +121,8 @@ class BrowserUseTool(BaseTool, Generic[Context]):
             "extract_content": ["goal"],
         },
     }
+    # All calls drive one shared browser session
+    parallel_safe: bool = False
 
     lock: asyncio.Lock = Field(default_factory=asyncio.Lock)
     browser: Optional[BrowserUseBrowser] = Field(default=None, exclude=True)
@@ -379,9 +382,10 @@ class BrowserUseTool(BaseTool, Generic[Context]):
                         )
 
                     page = await context.get_current_page()
-                    import markdownify
-
-                    content = markdownify.markdownify(await page.content())
+                    extracted = await HTMLExtractor.extract(
+                        await page.content(), page.url
+                    )
+                    content = extracted.markdown
 
                     prompt = f"""\
 Your task is to extract the content of the page. You will be given a page and a goal, and you should extract all relevant information around this goal from the page. If the goal is vague, summarize the page. Respond in json format.
@@ -21,6 +21,8 @@ class PythonExecute(BaseTool):
         },
         "required": ["code"],
     }
+    # Code can change files and processes, which can't be undone
+    parallel_safe: bool = False
 
     def _run_code(self, code: str, result_dict: dict, safe_globals: dict) -> None:
         original_stdout = sys.stdout
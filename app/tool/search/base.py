@@ -1,8 +1,37 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional
 
+import httpx
 from pydantic import BaseModel, Field
 
 
+# Threads for engines without a native async search, kept apart from the
+# default executor so searches don't queue behind unrelated blocking work
+SEARCH_THREADS = 16
+_search_executor = ThreadPoolExecutor(
+    max_workers=SEARCH_THREADS, thread_name_prefix="web-search"
+)
+
+
+def close_client(client: httpx.AsyncClient, loop: asyncio.AbstractEventLoop) -> None:
+    """
+    Close a client left behind by another event loop.
+
+    The close has to run on the loop the client was created on. A closed loop
+    can't run it anymore, so the client is just dropped and its sockets are
+    released when it's collected.
+    """
+    if loop.is_closed():
+        return
+    closing = client.aclose()
+    try:
+        asyncio.run_coroutine_threadsafe(closing, loop)
+    except RuntimeError:
+        # The loop was closed in the meantime
+        closing.close()
+
+
 class SearchItem(BaseModel):
     """Represents a single search result item"""
 
@@ -38,3 +67,26 @@ class WebSearchEngine(BaseModel):
             List[SearchItem]: A list of SearchItem objects matching the search query.
         """
         raise NotImplementedError
+
+    async def perform_search_async(
+        self, query: str, num_results: int = 10, *args, **kwargs
+    ) -> List[SearchItem]:
+        """
+        Perform a web search without blocking the event loop.
+
+        Engines with a native async implementation override this. The default
+        runs `perform_search` in a thread pool reserved for searches.
+
+        Args:
+            query (str): The search query to submit to the search engine.
+            num_results (int, optional): The number of search results to return. Default is 10.
+            args: Additional arguments.
+            kwargs: Additional keyword arguments.
+
+        Returns:
+            List[SearchItem]: A list of SearchItem objects matching the search query.
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            _search_executor,
+            lambda: list(self.perform_search(query, num_results, *args, **kwargs)),
+        )
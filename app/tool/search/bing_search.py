@@ -1,10 +1,19 @@
+import asyncio
+import math
 from typing import List, Optional, Tuple
 
+import httpx
 import requests
 from bs4 import BeautifulSoup
+from pydantic import PrivateAttr
 
 from app.logger import logger
-from app.tool.search.base import SearchItem, WebSearchEngine
+from app.tool.search.base import (
+    SearchItem,
+    WebSearchEngine,
+    _search_executor,
+    close_client,
+)
 
 
 ABSTRACT_MAX_LENGTH = 300
@@ -33,11 +42,18 @@ HEADERS = {
 
 BING_HOST_URL = "https://www.bing.com"
 BING_SEARCH_URL = "https://www.bing.com/search?q="
+RESULTS_PER_PAGE = 10
+# Rounds of concurrent page requests before settling for fewer results
+MAX_PAGE_ROUNDS = 3
 
 
 class BingSearchEngine(WebSearchEngine):
     session: Optional[requests.Session] = None
 
+    # The async client belongs to the event loop it was created on
+    _client: Optional[httpx.AsyncClient] = PrivateAttr(default=None)
+    _client_loop: Optional[asyncio.AbstractEventLoop] = PrivateAttr(default=None)
+
     def __init__(self, **data):
         """Initialize the BingSearch tool with a requests session."""
         super().__init__(**data)
@@ -86,53 +102,88 @@ class BingSearchEngine(WebSearchEngine):
         try:
             res = self.session.get(url=url)
             res.encoding = "utf-8"
-            root = BeautifulSoup(res.text, "lxml")
-
-            list_data = []
-            ol_results = root.find("ol", id="b_results")
-            if not ol_results:
-                return [], None
-
-            for li in ol_results.find_all("li", class_="b_algo"):
-                title = ""
-                url = ""
-                abstract = ""
-                try:
-                    h2 = li.find("h2")
-                    if h2:
-                        title = h2.text.strip()
-                        url = h2.a["href"].strip()
-
-                    p = li.find("p")
-                    if p:
-                        abstract = p.text.strip()
-
-                    if ABSTRACT_MAX_LENGTH and len(abstract) > ABSTRACT_MAX_LENGTH:
-                        abstract = abstract[:ABSTRACT_MAX_LENGTH]
-
-                    rank_start += 1
-
-                    # Create a SearchItem object
-                    list_data.append(
-                        SearchItem(
-                            title=title or f"Bing Result {rank_start}",
-                            url=url,
-                            description=abstract,
-                        )
-                    )
-                except Exception:
-                    continue
-
-            next_btn = root.find("a", title="Next page")
-            if not next_btn:
-                return list_data, None
-
-            next_url = BING_HOST_URL + next_btn["href"]
-            return list_data, next_url
+            return self._parse_results(res.text, rank_start)
         except Exception as e:
             logger.warning(f"Error parsing HTML: {e}")
             return [], None
 
+    @staticmethod
+    def _parse_results(
+        html: str, rank_start: int = 0
+    ) -> Tuple[List[SearchItem], Optional[str]]:
+        """
+        Extract search results and the next page URL from a Bing result page.
+
+        Returns:
+            tuple: (List of SearchItem objects, next page URL or None)
+        """
+        root = BeautifulSoup(html, "lxml")
+
+        list_data = []
+        ol_results = root.find("ol", id="b_results")
+        if not ol_results:
+            return [], None
+
+        for li in ol_results.find_all("li", class_="b_algo"):
+            title = ""
+            url = ""
+            abstract = ""
+            try:
+                h2 = li.find("h2")
+                if h2:
+                    title = h2.text.strip()
+                    url = h2.a["href"].strip()
+
+                p = li.find("p")
+                if p:
+                    abstract = p.text.strip()
+
+                if ABSTRACT_MAX_LENGTH and len(abstract) > ABSTRACT_MAX_LENGTH:
+                    abstract = abstract[:ABSTRACT_MAX_LENGTH]
+
+                rank_start += 1
+
+                # Create a SearchItem object
+                list_data.append(
+                    SearchItem(
+                        title=title or f"Bing Result {rank_start}",
+                        url=url,
+                        description=abstract,
+                    )
+                )
+            except Exception:
+                continue
+
+        next_btn = root.find("a", title="Next page")
+        if not next_btn:
+            return list_data, None
+
+        next_url = BING_HOST_URL + next_btn["href"]
+        return list_data, next_url
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            if self._client is not None:
+                close_client(self._client, self._client_loop)
+            self._client_loop = loop
+            self._client = httpx.AsyncClient(
+                headers=HEADERS, follow_redirects=True, timeout=10
+            )
+        return self._client
+
+    async def _fetch_page(self, query: str, first: int) -> str:
+        """Fetch one result page, starting at result number `first`"""
+        try:
+            res = await self._get_client().get(
+                BING_HOST_URL + "/search", params={"q": query, "first": first}
+            )
+            res.encoding = "utf-8"
+            return res.text
+        except httpx.HTTPError as e:
+            logger.warning(f"Error fetching Bing results page {first}: {e}")
+            return ""
+
     def perform_search(
         self, query: str, num_results: int = 10, *args, **kwargs
     ) -> List[SearchItem]:
@@ -142,3 +193,43 @@ class BingSearchEngine(WebSearchEngine):
         Returns results formatted according to SearchItem model.
         """
         return self._search_sync(query, num_results=num_results)
+
+    async def perform_search_async(
+        self, query: str, num_results: int = 10, *args, **kwargs
+    ) -> List[SearchItem]:
+        """
+        Bing search engine, requesting all result pages it needs at once.
+
+        Returns results formatted according to SearchItem model.
+        """
+        if not query:
+            return []
+
+        loop = asyncio.get_running_loop()
+        results: List[SearchItem] = []
+        seen = set()
+        first = 1
+        for _ in range(MAX_PAGE_ROUNDS):
+            pages = max(1, math.ceil((num_results - len(results)) / RESULTS_PER_PAGE))
+            offsets = [first + i * RESULTS_PER_PAGE for i in range(pages)]
+            first = offsets[-1] + RESULTS_PER_PAGE
+            html_pages = await asyncio.gather(
+                *(self._fetch_page(query, offset) for offset in offsets)
+            )
+
+            next_url = None
+            for html in html_pages:
+                # Parsing a page takes long enough to hold up other tasks
+                items, next_url = await loop.run_in_executor(
+                    _search_executor, self._parse_results, html, len(results)
+                )
+                for item in items:
+                    # Pages may overlap when Bing returns fewer than a full page
+                    if item.url not in seen:
+                        seen.add(item.url)
+                        results.append(item)
+
+            if len(results) >= num_results or not next_url:
+                break
+
+        return results[:num_results]
@@ -98,6 +98,8 @@ class StrReplaceEditor(BaseTool):
         },
         "required": ["command", "path"],
     }
+    # Edits read, modify and write files, so concurrent calls could lose edits
+    parallel_safe: bool = False
     _file_history: DefaultDict[PathLike, List[str]] = defaultdict(list)
     _local_operator: LocalFileOperator = LocalFileOperator()
     _sandbox_operator: SandboxFileOperator = SandboxFileOperator()
@@ -1,5 +1,5 @@
 """Collection classes for managing multiple tools."""
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from app.exceptions import ToolError
 from app.tool.base import BaseTool, ToolFailure, ToolResult
@@ -15,11 +15,33 @@ class ToolCollection:
         self.tools = tools
         self.tool_map = {tool.name: tool for tool in tools}
 
+    @property
+    def tools(self) -> Tuple[BaseTool, ...]:
+        return self._tools
+
+    @tools.setter
+    def tools(self, value: Tuple[BaseTool, ...]):
+        self._tools = value
+        # Serialized params and their token cost depend on the tool set
+        self._params: Optional[List[Dict[str, Any]]] = None
+        self._params_tokens: Dict[str, int] = {}
+
     def __iter__(self):
         return iter(self.tools)
 
     def to_params(self) -> List[Dict[str, Any]]:
-        return [tool.to_param() for tool in self.tools]
+        """Get the function call params of all tools, built once per tool set."""
+        if self._params is None:
+            self._params = [tool.to_param() for tool in self.tools]
+        return self._params
+
+    def count_tokens(self, token_counter) -> int:
+        """Get the token cost of the tool params, counted once per tokenizer."""
+        tokens = self._params_tokens.get(token_counter.name)
+        if tokens is None:
+            tokens = token_counter.count_tools(self.to_params())
+            self._params_tokens[token_counter.name] = tokens
+        return tokens
 
     async def execute(
         self, *, name: str, tool_input: Dict[str, Any] = None
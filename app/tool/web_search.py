@@ -1,12 +1,14 @@
 import asyncio
-from typing import Any, Dict, List, Optional
+import time
+from typing import Any, ClassVar, Dict, List, Optional, Set
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
 from pydantic import BaseModel, ConfigDict, Field, model_validator
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from app.cache import SQLiteCache, TTLCache
 from app.config import config
+from app.extraction import HTMLExtractor
 from app.logger import logger
 from app.tool.base import BaseTool, ToolResult
 from app.tool.search import (
@@ -16,7 +18,7 @@ from app.tool.search import (
     GoogleSearchEngine,
     WebSearchEngine,
 )
-from app.tool.search.base import SearchItem
+from app.tool.search.base import SearchItem, close_client
 
 
 class SearchResult(BaseModel):
@@ -104,13 +106,83 @@ class SearchResponse(ToolResult):
 
 
 class WebContentFetcher:
-    """Utility class for fetching web content."""
+    """
+    Utility class for fetching web content.
+
+    Pages are fetched with one shared httpx client, so connections are pooled
+    across searches, and at most `max_per_host` requests go to a single host at
+    a time. Bodies are streamed and reading stops after `max_bytes`, and
+    responses that aren't HTML or plain text are skipped without downloading
+    them.
+    """
+
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    }
+    text_types = ("text/html", "application/xhtml+xml", "text/plain")
+    max_bytes = 1_000_000
+    max_chars = 10000
+    max_connections = 20
+    max_per_host = 4
+
+    # Clients and semaphores belong to the event loop they were created on
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _client: Optional[httpx.AsyncClient] = None
+    _host_limits: Dict[str, asyncio.Semaphore] = {}
+    _page_cache: Optional[SQLiteCache] = None
+
+    @classmethod
+    def _get_client(cls) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if cls._client is None or cls._loop is not loop:
+            if cls._client is not None:
+                close_client(cls._client, cls._loop)
+            cls._loop = loop
+            cls._host_limits = {}
+            cls._client = httpx.AsyncClient(
+                headers=cls.headers,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=cls.max_connections,
+                    max_keepalive_connections=cls.max_connections,
+                ),
+            )
+        return cls._client
+
+    @classmethod
+    def _host_limit(cls, url: str) -> asyncio.Semaphore:
+        host = httpx.URL(url).host
+        if host not in cls._host_limits:
+            cls._host_limits[host] = asyncio.Semaphore(cls.max_per_host)
+        return cls._host_limits[host]
+
+    @classmethod
+    def _get_page_cache(cls) -> Optional[SQLiteCache]:
+        """Get the shared page cache, or None if caching is disabled"""
+        settings = config.page_cache
+        if not settings or not settings.enabled:
+            return None
+        if cls._page_cache is None:
+            cls._page_cache = SQLiteCache(
+                config.root_path / settings.database,
+                max_entries=settings.max_entries,
+                max_bytes=(
+                    int(settings.max_size_mb * 1_000_000)
+                    if settings.max_size_mb
+                    else None
+                ),
+            )
+        return cls._page_cache
 
-    @staticmethod
-    async def fetch_content(url: str, timeout: int = 10) -> Optional[str]:
+    @classmethod
+    async def fetch_content(cls, url: str, timeout: int = 10) -> Optional[str]:
         """
         Fetch and extract the main content from a webpage.
 
+        With the page cache enabled, pages checked within `max_age` seconds are
+        served from the cache, older ones are revalidated with a conditional
+        request, and in offline mode only cached pages are returned.
+
         Args:
             url: The URL to fetch content from
             timeout: Request timeout in seconds
@@ -118,39 +190,224 @@ class WebContentFetcher:
         Returns:
             Extracted text content or None if fetching fails
         """
-        headers = {
-            "WebSearch": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
-
-        try:
-            # Use asyncio to run requests in a thread pool
-            response = await asyncio.get_event_loop().run_in_executor(
-                None, lambda: requests.get(url, headers=headers, timeout=timeout)
-            )
-
-            if response.status_code != 200:
-                logger.warning(
-                    f"Failed to fetch content from {url}: HTTP {response.status_code}"
-                )
+        page_cache = cls._get_page_cache()
+        cached = await page_cache.aget(url) if page_cache else None
+        if page_cache:
+            settings = config.page_cache
+            if cached is not None and (
+                settings.offline or time.time() - cached["checked"] < settings.max_age
+            ):
+                return cached["text"]
+            if settings.offline:
+                logger.info(f"Skipping {url}: not in the page cache while offline")
                 return None
 
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(response.text, "html.parser")
+        try:
+            page = await cls._fetch_page(url, timeout, cached)
+        except Exception as e:
+            logger.warning(f"Error fetching content from {url}: {e}")
+            # A stale copy is better than nothing
+            return cached["text"] if cached else None
 
-            # Remove script and style elements
-            for script in soup(["script", "style", "header", "footer", "nav"]):
-                script.extract()
+        if page is None:
+            return None
+        if page_cache:
+            await page_cache.aset(url, page)
+        return page["text"]
+
+    @classmethod
+    async def _fetch_page(
+        cls, url: str, timeout: int, cached: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Download a page and extract its text, revalidating a cached copy.
 
-            # Get text content
-            text = soup.get_text(separator="\n", strip=True)
+        Returns the page as stored in the page cache: its text, validators and
+        the time it was last checked.
+        """
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        client = cls._get_client()
+        async with cls._host_limit(url):
+            async with client.stream(
+                "GET", url, headers=headers, timeout=timeout
+            ) as response:
+                validators = {
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified"),
+                }
+                if response.status_code == 304 and cached:
+                    logger.debug(f"Cached content of {url} is still current")
+                    return {
+                        **cached,
+                        **{k: v for k, v in validators.items() if v},
+                        "checked": time.time(),
+                    }
+                if response.status_code != 200:
+                    logger.warning(
+                        f"Failed to fetch content from {url}: HTTP {response.status_code}"
+                    )
+                    return None
+
+                content_type = response.headers.get("content-type", "text/html")
+                media_type = content_type.split(";")[0].strip().lower()
+                if media_type not in cls.text_types:
+                    logger.info(f"Skipping {url}: unsupported content {media_type}")
+                    return None
+
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) >= cls.max_bytes:
+                        # Enough for the text we keep; leave the rest unread
+                        break
+                text = bytes(body[: cls.max_bytes]).decode(
+                    response.encoding or "utf-8", errors="replace"
+                )
 
-            # Clean up whitespace and limit size (100KB max)
-            text = " ".join(text.split())
-            return text[:10000] if text else None
+        if media_type != "text/plain":
+            # Large pages are parsed in a worker process
+            text = (await HTMLExtractor.extract(text, url)).text
 
-        except Exception as e:
-            logger.warning(f"Error fetching content from {url}: {e}")
+        # Clean up whitespace and limit size
+        text = " ".join(text.split())
+        if not text:
             return None
+        return {"text": text[: cls.max_chars], "checked": time.time(), **validators}
+
+
+class EngineStats:
+    """
+    Tracks the latency and error rate of each search engine.
+
+    Both are exponential moving averages, so engines that recover or degrade
+    are reranked within a few searches. Engines without observations are
+    assumed to be moderately fast and reliable, which keeps them in their
+    configured order relative to each other.
+    """
+
+    def __init__(
+        self, alpha: float = 0.3, initial_latency: float = 2.0, min_success: float = 0.1
+    ):
+        self.alpha = alpha
+        self.initial_latency = initial_latency
+        self.min_success = min_success
+        self.latency: Dict[str, float] = {}
+        self.error_rate: Dict[str, float] = {}
+
+    def record(self, engine: str, latency: float, success: bool) -> None:
+        """Fold the outcome of one search into the engine's averages"""
+        error = 0.0 if success else 1.0
+        if engine not in self.latency:
+            self.latency[engine] = latency
+            self.error_rate[engine] = error
+            return
+        self.latency[engine] += self.alpha * (latency - self.latency[engine])
+        self.error_rate[engine] += self.alpha * (error - self.error_rate[engine])
+
+    def score(self, engine: str) -> float:
+        """Expected seconds until the engine returns results; lower is better"""
+        latency = self.latency.get(engine, self.initial_latency)
+        success = 1.0 - self.error_rate.get(engine, 0.0)
+        return latency / max(success, self.min_success)
+
+    def rank(self, engines: List[str]) -> List[str]:
+        """Order engines by score, keeping the given order for ties"""
+        return sorted(engines, key=self.score)
+
+    def clear(self) -> None:
+        self.latency.clear()
+        self.error_rate.clear()
+
+
+class RateLimiter:
+    """
+    Token bucket allowing `rate` searches per second, in bursts of up to
+    `burst` searches.
+
+    Callers reserve a token before waiting for it, so concurrent searches
+    queue up in order instead of all waking up at once.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def delay(self) -> float:
+        """Seconds until a token is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    async def acquire(self, max_wait: Optional[float] = None) -> bool:
+        """Take a token, waiting for it unless that would exceed max_wait"""
+        wait = self.delay()
+        if max_wait is not None and wait > max_wait:
+            return False
+        self.tokens -= 1
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures of an engine.
+
+    While open, searches skip the engine. Once `cooldown` seconds have passed,
+    a single probe may run; success closes the circuit, while failure keeps it
+    open for twice as long, up to `max_cooldown`.
+    """
+
+    def __init__(
+        self, threshold: int = 3, cooldown: float = 60.0, max_cooldown: float = 600.0
+    ):
+        self.threshold = max(1, threshold)
+        self.cooldown = cooldown
+        self.max_cooldown = max(cooldown, max_cooldown)
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.current_cooldown = cooldown
+        self.probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def should_probe(self) -> bool:
+        """Whether an open circuit is due for a probe, claiming it if so"""
+        if (
+            not self.is_open
+            or self.probing
+            or time.monotonic() - self.opened_at < self.current_cooldown
+        ):
+            return False
+        self.probing = True
+        return True
+
+    def record(self, success: bool) -> None:
+        """Count the outcome of a search or probe"""
+        self.probing = False
+        if success:
+            self.failures = 0
+            self.opened_at = None
+            self.current_cooldown = self.cooldown
+            return
+
+        self.failures += 1
+        if self.is_open:
+            # A failed probe
+            self.current_cooldown = min(self.current_cooldown * 2, self.max_cooldown)
+            self.opened_at = time.monotonic()
+        elif self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
 
 
 class WebSearch(BaseTool):
@@ -197,6 +454,13 @@ class WebSearch(BaseTool):
         "bing": BingSearchEngine(),
     }
     content_fetcher: WebContentFetcher = WebContentFetcher()
+    # Shared by all instances, so every search improves the engine order
+    engine_stats: ClassVar[EngineStats] = EngineStats()
+    _search_cache: ClassVar[Optional[TTLCache]] = None
+    # Keyed by engine name and shared by all instances, like engine_stats
+    rate_limiters: ClassVar[Dict[str, RateLimiter]] = {}
+    circuit_breakers: ClassVar[Dict[str, CircuitBreaker]] = {}
+    _probes: ClassVar[Set[asyncio.Task]] = set()
 
     async def execute(
         self,
@@ -230,6 +494,9 @@ class WebSearch(BaseTool):
             if config.search_config
             else 3
         )
+        if config.search_config and config.search_config.circuit_breaker:
+            # Failing engines are skipped and probed in the background instead
+            max_retries = 0
 
         # Use config values for lang and country if not specified
         if lang is None:
@@ -248,6 +515,19 @@ class WebSearch(BaseTool):
 
         search_params = {"lang": lang, "country": country}
 
+        search_cache = self._get_search_cache()
+        cache_key = None
+        if search_cache:
+            cache_key = self._search_cache_key(
+                query, num_results, lang, country, fetch_content
+            )
+            cached = await search_cache.aget(cache_key)
+            if cached is not None:
+                logger.info(f"Using cached search results for '{query}'")
+                return self._success_response(
+                    query, [SearchResult(**r) for r in cached], lang, country
+                )
+
         # Try searching with retries when all engines fail
         for retry_count in range(max_retries + 1):
             results = await self._try_all_engines(query, num_results, search_params)
@@ -257,17 +537,11 @@ class WebSearch(BaseTool):
                 if fetch_content:
                     results = await self._fetch_content_for_results(results)
 
-                # Return a successful structured response
-                return SearchResponse(
-                    status="success",
-                    query=query,
-                    results=results,
-                    metadata=SearchMetadata(
-                        total_results=len(results),
-                        language=lang,
-                        country=country,
-                    ),
-                )
+                if search_cache:
+                    await search_cache.aset(
+                        cache_key, [r.model_dump() for r in results]
+                    )
+                return self._success_response(query, results, lang, country)
 
             if retry_count < max_retries:
                 # All engines failed, wait and retry
@@ -287,45 +561,236 @@ class WebSearch(BaseTool):
             results=[],
         )
 
+    @staticmethod
+    def _success_response(
+        query: str, results: List[SearchResult], lang: str, country: str
+    ) -> SearchResponse:
+        """Build a successful structured response"""
+        return SearchResponse(
+            status="success",
+            query=query,
+            results=results,
+            metadata=SearchMetadata(
+                total_results=len(results),
+                language=lang,
+                country=country,
+            ),
+        )
+
+    @classmethod
+    def _get_search_cache(cls) -> Optional[TTLCache]:
+        """Get the shared search cache, or None if caching is disabled"""
+        settings = config.search_cache
+        if not settings or not settings.enabled:
+            return None
+        if cls._search_cache is None:
+            if settings.database:
+                cls._search_cache = SQLiteCache(
+                    config.root_path / settings.database,
+                    max_entries=settings.max_entries,
+                    ttl=settings.ttl,
+                )
+            else:
+                cls._search_cache = TTLCache(
+                    max_entries=settings.max_entries, ttl=settings.ttl
+                )
+        return cls._search_cache
+
+    @staticmethod
+    def _search_cache_key(
+        query: str, num_results: int, lang: str, country: str, fetch_content: bool
+    ) -> str:
+        """
+        Build the cache key for a search.
+
+        Queries differing only in case or whitespace share an entry. The
+        preferred engine is part of the key, as switching it changes results.
+        """
+        engine = (
+            getattr(config.search_config, "engine", "google").lower()
+            if config.search_config
+            else "google"
+        )
+        return TTLCache.make_key(
+            {
+                "query": " ".join(query.casefold().split()),
+                "engine": engine,
+                "lang": lang,
+                "country": country,
+                "num_results": num_results,
+                "fetch_content": fetch_content,
+            }
+        )
+
     async def _try_all_engines(
         self, query: str, num_results: int, search_params: Dict[str, Any]
     ) -> List[SearchResult]:
         """Try all search engines in the configured order."""
         engine_order = self._get_engine_order()
+        if config.search_config and config.search_config.race:
+            return await self._race_engines(
+                engine_order,
+                query,
+                num_results,
+                search_params,
+                width=max(1, config.search_config.race_engines),
+                merge=config.search_config.race_merge,
+            )
+
         failed_engines = []
 
         for engine_name in engine_order:
-            engine = self._search_engine[engine_name]
             logger.info(f"🔎 Attempting search with {engine_name.capitalize()}...")
-            search_items = await self._perform_search_with_engine(
-                engine, query, num_results, search_params
+            results = await self._search_with_engine(
+                engine_name, query, num_results, search_params
             )
 
-            if not search_items:
+            if not results:
+                failed_engines.append(engine_name.capitalize())
                 continue
 
             if failed_engines:
                 logger.info(
                     f"Search successful with {engine_name.capitalize()} after trying: {', '.join(failed_engines)}"
                 )
-
-            # Transform search items into structured results
-            return [
-                SearchResult(
-                    position=i + 1,
-                    url=item.url,
-                    title=item.title
-                    or f"Result {i+1}",  # Ensure we always have a title
-                    description=item.description or "",
-                    source=engine_name,
-                )
-                for i, item in enumerate(search_items)
-            ]
+            return results
 
         if failed_engines:
             logger.error(f"All search engines failed: {', '.join(failed_engines)}")
         return []
 
+    async def _race_engines(
+        self,
+        engine_order: List[str],
+        query: str,
+        num_results: int,
+        search_params: Dict[str, Any],
+        width: int,
+        merge: bool = False,
+    ) -> List[SearchResult]:
+        """
+        Query engines `width` at a time, moving on to the next ones only if
+        all engines of a round fail.
+
+        Without merge the first engine to return results wins and the searches
+        still running are cancelled. With merge all engines of the round are
+        awaited and their results interleaved, dropping duplicate URLs.
+        """
+        for start in range(0, len(engine_order), width):
+            names = engine_order[start : start + width]
+            logger.info(
+                f"🔎 Racing search engines: {', '.join(n.capitalize() for n in names)}"
+            )
+            tasks = [
+                asyncio.create_task(
+                    self._search_with_engine(name, query, num_results, search_params)
+                )
+                for name in names
+            ]
+            try:
+                if merge:
+                    merged = self._merge_results(
+                        await asyncio.gather(*tasks), num_results
+                    )
+                    if merged:
+                        return merged
+                    continue
+
+                for next_done in asyncio.as_completed(tasks):
+                    results = await next_done
+                    if results:
+                        logger.info(
+                            f"Search race won by {results[0].source.capitalize()}"
+                        )
+                        return results
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        logger.error(f"All search engines failed: {', '.join(engine_order)}")
+        return []
+
+    @staticmethod
+    def _merge_results(
+        result_lists: List[List[SearchResult]], num_results: int
+    ) -> List[SearchResult]:
+        """Interleave result lists by rank, keeping the first result per URL"""
+        merged: List[SearchResult] = []
+        seen = set()
+        for rank in range(max((len(r) for r in result_lists), default=0)):
+            for results in result_lists:
+                if rank >= len(results):
+                    continue
+                result = results[rank]
+                key = result.url.rstrip("/").lower()
+                if key in seen:
+                    continue
+                seen.add(key)
+                merged.append(result.model_copy(update={"position": len(merged) + 1}))
+                if len(merged) == num_results:
+                    return merged
+        return merged
+
+    async def _search_with_engine(
+        self,
+        engine_name: str,
+        query: str,
+        num_results: int,
+        search_params: Dict[str, Any],
+    ) -> List[SearchResult]:
+        """
+        Search with one engine, recording how fast and successful it was.
+
+        Engines with an open circuit are skipped, starting a background probe
+        when one is due, as are engines whose rate limit would hold the search
+        back for longer than `rate_limit_max_wait`.
+        """
+        breaker = self._get_circuit_breaker(engine_name)
+        if breaker and breaker.is_open:
+            if breaker.should_probe():
+                self._start_probe(engine_name, query, num_results, search_params)
+            logger.info(f"Skipping {engine_name.capitalize()}: circuit is open")
+            return []
+
+        limiter = self._get_rate_limiter(engine_name)
+        if limiter and not await limiter.acquire(
+            config.search_config.rate_limit_max_wait
+        ):
+            logger.info(f"Skipping {engine_name.capitalize()}: rate limited")
+            return []
+
+        engine = self._search_engine[engine_name]
+        # With a circuit breaker, failures move on to the next engine at once
+        search = self._run_search if breaker else self._perform_search_with_engine
+        started = time.perf_counter()
+        try:
+            search_items = await search(engine, query, num_results, search_params)
+        except Exception as e:
+            logger.warning(f"Search with {engine_name.capitalize()} failed: {e}")
+            search_items = []
+        self.engine_stats.record(
+            engine_name, time.perf_counter() - started, bool(search_items)
+        )
+        if breaker:
+            breaker.record(bool(search_items))
+            if breaker.is_open:
+                logger.warning(
+                    f"Circuit for {engine_name.capitalize()} opened after "
+                    f"{breaker.failures} consecutive failures"
+                )
+
+        # Transform search items into structured results
+        return [
+            SearchResult(
+                position=i + 1,
+                url=item.url,
+                title=item.title or f"Result {i+1}",  # Ensure we always have a title
+                description=item.description or "",
+                source=engine_name,
+            )
+            for i, item in enumerate(search_items)
+        ]
+
     async def _fetch_content_for_results(
         self, results: List[SearchResult]
     ) -> List[SearchResult]:
@@ -382,8 +847,87 @@ class WebSearch(BaseTool):
         )
         engine_order.extend([e for e in self._search_engine if e not in engine_order])
 
+        if config.search_config and config.search_config.adaptive_order:
+            engine_order = self.engine_stats.rank(engine_order)
         return engine_order
 
+    def _get_rate_limiter(self, engine_name: str) -> Optional[RateLimiter]:
+        """Get the engine's rate limiter, or None if it isn't rate limited"""
+        settings = config.search_config
+        if not settings:
+            return None
+        rate = settings.engine_rate_limits.get(engine_name, settings.rate_limit)
+        if not rate:
+            return None
+        if engine_name not in self.rate_limiters:
+            self.rate_limiters[engine_name] = RateLimiter(
+                rate, settings.rate_limit_burst
+            )
+        return self.rate_limiters[engine_name]
+
+    def _get_circuit_breaker(self, engine_name: str) -> Optional[CircuitBreaker]:
+        """Get the engine's circuit breaker, or None if breakers are disabled"""
+        settings = config.search_config
+        if not settings or not settings.circuit_breaker:
+            return None
+        if engine_name not in self.circuit_breakers:
+            self.circuit_breakers[engine_name] = CircuitBreaker(
+                settings.breaker_threshold, settings.breaker_cooldown
+            )
+        return self.circuit_breakers[engine_name]
+
+    def _start_probe(
+        self,
+        engine_name: str,
+        query: str,
+        num_results: int,
+        search_params: Dict[str, Any],
+    ) -> None:
+        """Probe an engine with an open circuit without delaying the search"""
+        task = asyncio.create_task(
+            self._probe_engine(engine_name, query, num_results, search_params)
+        )
+        # Keep a reference so the task isn't garbage collected while running
+        self._probes.add(task)
+        task.add_done_callback(self._probes.discard)
+        # Release the claim however the probe ends, even if it is cancelled
+        # before it starts and records nothing
+        breaker = self.circuit_breakers[engine_name]
+        task.add_done_callback(lambda _: setattr(breaker, "probing", False))
+
+    async def _probe_engine(
+        self,
+        engine_name: str,
+        query: str,
+        num_results: int,
+        search_params: Dict[str, Any],
+    ) -> None:
+        """Run one search with an engine, closing its circuit if it succeeds"""
+        breaker = self.circuit_breakers[engine_name]
+        limiter = self._get_rate_limiter(engine_name)
+        if limiter:
+            await limiter.acquire()
+
+        started = time.perf_counter()
+        try:
+            search_items = await self._run_search(
+                self._search_engine[engine_name], query, num_results, search_params
+            )
+        except Exception as e:
+            logger.debug(f"Probe of {engine_name.capitalize()} failed: {e}")
+            search_items = []
+        self.engine_stats.record(
+            engine_name, time.perf_counter() - started, bool(search_items)
+        )
+        breaker.record(bool(search_items))
+        if breaker.is_open:
+            logger.info(
+                f"{engine_name.capitalize()} is still failing, next probe in "
+                f"{breaker.current_cooldown:.0f}s"
+            )
+        else:
+            logger.info(f"{engine_name.capitalize()} recovered, circuit closed")
+
     @retry(
         stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10)
     )
@@ -394,17 +938,27 @@ class WebSearch(BaseTool):
         num_results: int,
         search_params: Dict[str, Any],
     ) -> List[SearchItem]:
-        """Execute search with the given engine and parameters."""
-        return await asyncio.get_event_loop().run_in_executor(
-            None,
-            lambda: list(
-                engine.perform_search(
-                    query,
-                    num_results=num_results,
-                    lang=search_params.get("lang"),
-                    country=search_params.get("country"),
-                )
-            ),
+        """Execute search with the given engine and parameters, retrying failures."""
+        return await self._run_search(engine, query, num_results, search_params)
+
+    async def _run_search(
+        self,
+        engine: WebSearchEngine,
+        query: str,
+        num_results: int,
+        search_params: Dict[str, Any],
+    ) -> List[SearchItem]:
+        """
+        Run one search with an engine.
+
+        Engines with a native async search run on the event loop; the others
+        fall back to their synchronous search in a thread pool.
+        """
+        return await engine.perform_search_async(
+            query,
+            num_results=num_results,
+            lang=search_params.get("lang"),
+            country=search_params.get("country"),
         )
 
 
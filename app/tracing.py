@@ -0,0 +1,322 @@
+"""
+Lightweight tracing for agent runs.
+
+Code under measurement opens spans with `tracer.span(name)`. Spans nest through
+a context variable, so tool calls running concurrently in their own tasks still
+get the right parent. Finished spans are handed to an exporter, which appends
+them to a JSONL file, either in a flat format or as OTLP JSON that OpenTelemetry
+tooling can import.
+
+When tracing is disabled `span()` returns a shared no-op context, so
+instrumented code pays for little more than the call itself.
+"""
+import atexit
+import json
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+from app.config import TracingSettings, config
+from app.logger import logger
+
+
+class Span:
+    """A timed operation with attributes, events and a parent span."""
+
+    __slots__ = (
+        "name",
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "events",
+        "error",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional["Span"] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.events.append(
+            {"name": name, "time_ns": time.time_ns(), "attributes": attributes or {}}
+        )
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the span started, or its duration once ended"""
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.elapsed_ms(), 3),
+            "attributes": self.attributes,
+            "events": self.events,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def elapsed_ms(self) -> float:
+        return 0.0
+
+
+NOOP_SPAN = _NoopSpan()
+_NOOP_CONTEXT = nullcontext(NOOP_SPAN)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class JSONLSpanExporter:
+    """
+    Appends each finished span to a file as one JSON object per line.
+
+    Like loguru's `enqueue=True`, spans are encoded right away but written by a
+    background thread, so ending a span never waits on the disk. `flush()`
+    blocks until everything queued so far is written, and runs at exit.
+    """
+
+    # One writer thread serves all exporters, so lines never interleave
+    _queue: "queue.Queue[Tuple[Path, str]]" = queue.Queue()
+    _writer: Optional[threading.Thread] = None
+    _writer_lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def export(self, span: Span) -> None:
+        self._write(self.encode(span))
+
+    def encode(self, span: Span) -> Dict[str, Any]:
+        return span.to_dict()
+
+    @classmethod
+    def flush(cls) -> None:
+        """Wait until all queued spans are written"""
+        cls._queue.join()
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        self._start_writer()
+        self._queue.put((self.path, line))
+
+    @classmethod
+    def _start_writer(cls) -> None:
+        if cls._writer is not None:
+            return
+        with cls._writer_lock:
+            if cls._writer is None:
+                cls._writer = threading.Thread(
+                    target=cls._drain, name="span-writer", daemon=True
+                )
+                cls._writer.start()
+                atexit.register(cls.flush)
+
+    @classmethod
+    def _drain(cls) -> None:
+        while True:
+            batch = [cls._queue.get()]
+            # Write whatever piled up meanwhile with one open per file
+            while True:
+                try:
+                    batch.append(cls._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines: Dict[Path, List[str]] = {}
+            for path, line in batch:
+                lines.setdefault(path, []).append(line + "\n")
+            for path, file_lines in lines.items():
+                try:
+                    with path.open("a", encoding="utf-8") as f:
+                        f.writelines(file_lines)
+                except OSError as e:
+                    logger.warning(f"Failed to write spans to {path}: {e}")
+            for _ in batch:
+                cls._queue.task_done()
+
+
+class OTLPFileExporter(JSONLSpanExporter):
+    """
+    Writes spans in the OTLP JSON file format.
+
+    Each line is an `ExportTraceServiceRequest` holding a single span, as
+    written by the OpenTelemetry collector's file exporter.
+    """
+
+    def __init__(self, path: Path, service_name: str = "openmanus"):
+        super().__init__(path)
+        self.resource = {"attributes": self._attributes({"service.name": service_name})}
+
+    def encode(self, span: Span) -> Dict[str, Any]:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,  # SPAN_KIND_INTERNAL
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": self._attributes(span.attributes),
+            "events": [
+                {
+                    "timeUnixNano": str(event["time_ns"]),
+                    "name": event["name"],
+                    "attributes": self._attributes(event["attributes"]),
+                }
+                for event in span.events
+            ],
+            # STATUS_CODE_ERROR or STATUS_CODE_OK
+            "status": (
+                {"code": 2, "message": span.error} if span.error else {"code": 1}
+            ),
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        return {
+            "resourceSpans": [
+                {
+                    "resource": self.resource,
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": [otlp_span]}],
+                }
+            ]
+        }
+
+    @staticmethod
+    def _attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+        encoded = []
+        for key, value in attributes.items():
+            if isinstance(value, bool):
+                typed = {"boolValue": value}
+            elif isinstance(value, int):
+                typed = {"intValue": str(value)}
+            elif isinstance(value, float):
+                typed = {"doubleValue": value}
+            else:
+                typed = {"stringValue": str(value)}
+            encoded.append({"key": key, "value": typed})
+        return encoded
+
+
+class Tracer:
+    """Creates spans and hands finished ones to an exporter."""
+
+    def __init__(self, exporter: Optional[JSONLSpanExporter] = None):
+        self.exporter = exporter
+
+    @classmethod
+    def from_settings(cls, settings: Optional[TracingSettings]) -> "Tracer":
+        tracer = cls()
+        tracer.configure(settings)
+        return tracer
+
+    def configure(self, settings: Optional[TracingSettings]) -> None:
+        """Enable, disable or redirect tracing"""
+        if not settings or not settings.enabled:
+            self.exporter = None
+            return
+        path = config.root_path / settings.path
+        if settings.exporter == "otlp":
+            self.exporter = OTLPFileExporter(path, settings.service_name)
+        else:
+            self.exporter = JSONLSpanExporter(path)
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> ContextManager[Span]:
+        """Open a span that is a child of the current one"""
+        if self.exporter is None:
+            return _NOOP_CONTEXT
+        return self._span(self.exporter, name, attributes)
+
+    @staticmethod
+    @contextmanager
+    def _span(
+        exporter: JSONLSpanExporter,
+        name: str,
+        attributes: Optional[Dict[str, Any]],
+    ) -> Iterator[Span]:
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _current_span.reset(token)
+            exporter.export(span)
+
+    @staticmethod
+    def current_span() -> Any:
+        """The innermost open span, or a no-op span outside of any"""
+        return _current_span.get() or NOOP_SPAN
+
+
+tracer = Tracer.from_settings(config.tracing)
+
+
+def traced(name: str) -> Callable:
+    """Run each call of the decorated coroutine function in a span"""
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with tracer.span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,169 @@
+"""
+Record/replay transports for LLM API clients.
+
+A transport stands in for the client used by `LLM` and exposes the same
+`chat.completions.create` entry point. `RecordingTransport` forwards requests to
+a real client and appends each request/response pair, including streamed
+chunks, to a JSONL file. `ReplayTransport` answers requests from such a file
+without any network access, optionally reproducing the recorded latency, so
+agents and flows can be run and benchmarked offline.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
+
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from app.exceptions import OpenManusError
+from app.logger import logger
+
+
+class ReplayMissError(OpenManusError):
+    """Raised when a replayed request has no matching recording"""
+
+
+def request_key(params: Dict[str, Any]) -> str:
+    """Build a stable key for a chat completion request"""
+    request = {k: v for k, v in params.items() if k != "timeout"}
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def _to_jsonable(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    return vars(obj)
+
+
+class RecordingTransport:
+    """Forwards requests to a client and records every exchange to a JSONL file."""
+
+    # Appends from all transports go through one lock so lines never interleave
+    _write_lock = threading.Lock()
+
+    def __init__(self, client: Any, path: Union[str, Path]):
+        self.client = client
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.chat = self
+        self.completions = self
+
+    async def create(self, **params) -> Any:
+        key = request_key(params)
+        started = time.perf_counter()
+        response = await self.client.chat.completions.create(**params)
+
+        if hasattr(response, "__aiter__"):
+            return self._record_stream(key, params.get("model"), response, started)
+
+        self._write(
+            {
+                "key": key,
+                "model": params.get("model"),
+                "latency": round(time.perf_counter() - started, 4),
+                "response": response.model_dump(exclude_none=True),
+            }
+        )
+        return response
+
+    async def _record_stream(
+        self,
+        key: str,
+        model: Optional[str],
+        stream: AsyncIterator[ChatCompletionChunk],
+        started: float,
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        chunks, delays = [], []
+        last = started
+        async for chunk in stream:
+            now = time.perf_counter()
+            delays.append(round(now - last, 4))
+            last = now
+            chunks.append(chunk.model_dump(exclude_none=True))
+            yield chunk
+
+        self._write({"key": key, "model": model, "delays": delays, "chunks": chunks})
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=_to_jsonable)
+        with self._write_lock:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class ReplayTransport:
+    """
+    Answers requests from a file written by `RecordingTransport`.
+
+    Requests are matched on their full parameters. A request seen more often
+    than it was recorded replays its last recording again. With `strict=False`
+    requests that don't match fall back to the next unused recording in file
+    order, which keeps a replay going when prompts contain run-specific details
+    such as timestamps or paths.
+
+    `latency_scale` multiplies the recorded latency: 0 replays instantly, 1
+    reproduces the original timing.
+    """
+
+    def __init__(
+        self, path: Union[str, Path], latency_scale: float = 0.0, strict: bool = True
+    ):
+        self.path = Path(path)
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.chat = self
+        self.completions = self
+
+        self._records: List[Dict[str, Any]] = []
+        self._by_key: Dict[str, List[int]] = defaultdict(list)
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self._by_key[record["key"]].append(len(self._records))
+                    self._records.append(record)
+
+        self._used = [False] * len(self._records)
+        self._positions: Dict[str, int] = defaultdict(int)
+        self._cursor = 0
+
+    def _next_record(self, key: str) -> Dict[str, Any]:
+        indices = self._by_key.get(key)
+        if indices:
+            position = self._positions[key]
+            self._positions[key] = position + 1
+            index = indices[min(position, len(indices) - 1)]
+        elif self.strict:
+            raise ReplayMissError(f"No recorded response for request {key[:12]}")
+        else:
+            while self._cursor < len(self._records) and self._used[self._cursor]:
+                self._cursor += 1
+            if self._cursor == len(self._records):
+                raise ReplayMissError("Recording exhausted")
+            index = self._cursor
+            logger.warning(f"Replaying unmatched request with recording #{index}")
+
+        self._used[index] = True
+        return self._records[index]
+
+    async def create(self, **params) -> Any:
+        record = self._next_record(request_key(params))
+        if "chunks" in record:
+            return self._replay_stream(record)
+
+        if self.latency_scale:
+            await asyncio.sleep(record["latency"] * self.latency_scale)
+        return ChatCompletion.model_validate(record["response"])
+
+    async def _replay_stream(
+        self, record: Dict[str, Any]
+    ) -> AsyncIterator[ChatCompletionChunk]:
+        for delay, chunk in zip(record["delays"], record["chunks"]):
+            if self.latency_scale:
+                await asyncio.sleep(delay * self.latency_scale)
+            yield ChatCompletionChunk.model_validate(chunk)
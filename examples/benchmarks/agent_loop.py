@@ -0,0 +1,308 @@
+"""
+Benchmark the agent step loop against a scripted LLM and stub tools.
+
+Runs Manus, BrowserAgent, MCPAgent and PlanningFlow fully offline and reports,
+per scenario, step latency percentiles and the time spent per step on message
+formatting, token counting, tokenizer calls and tool dispatch, plus how much
+memory the run leaves allocated. Results are written as JSON so runs on
+different commits can be compared with --baseline.
+
+Usage:
+    python -m examples.benchmarks.agent_loop --repeat 5 --output bench.json
+    python -m examples.benchmarks.agent_loop --baseline bench.json
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import ExitStack
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List
+from unittest.mock import patch
+
+from app.agent.browser import BrowserAgent
+from app.agent.manus import Manus
+from app.agent.mcp import MCPAgent
+from app.agent.react import ReActAgent
+from app.agent.toolcall import ToolCallAgent
+from app.flow.planning import PlanningFlow
+from app.llm import LLM, TokenCounter
+from app.logger import logger
+from examples.benchmarks.stubs import (
+    ScriptedClient,
+    StubMCPSession,
+    StubTool,
+    build_llm,
+    ensure_tokenizer,
+    stub_tools,
+)
+
+
+class Profiler:
+    """Accumulates wall time spent in patched functions, by category."""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.step_times: List[float] = []
+        self._depth: Dict[str, int] = defaultdict(int)
+
+    def timed(self, category: str, func: Callable) -> Callable:
+        """Wrap func so its outermost calls are timed under category"""
+        if inspect.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self._record(category, time.perf_counter() - started)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            # Only time the outermost call when a category calls itself
+            self._depth[category] += 1
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._depth[category] -= 1
+                if not self._depth[category]:
+                    self._record(category, time.perf_counter() - started)
+
+        return wrapper
+
+    def _record(self, category: str, elapsed: float) -> None:
+        self.totals[category] += elapsed
+        self.calls[category] += 1
+        if category == "step":
+            self.step_times.append(elapsed)
+
+    def instrument(self, stack: ExitStack, llm: LLM) -> None:
+        """Patch the framework hot spots for the duration of stack"""
+        targets = [
+            (ReActAgent, "step", "step"),
+            (ToolCallAgent, "execute_tool", "tool_dispatch"),
+            (LLM, "format_messages", "format_messages"),
+            (TokenCounter, "count_message_tokens", "token_counting"),
+            (TokenCounter, "count_cached_message", "token_counting"),
+            (TokenCounter, "count_tools", "token_counting"),
+        ]
+        for owner, name, category in targets:
+            original = inspect.getattr_static(owner, name)
+            if isinstance(original, staticmethod):
+                wrapped = staticmethod(self.timed(category, original.__func__))
+            else:
+                wrapped = self.timed(category, original)
+            stack.enter_context(patch.object(owner, name, wrapped))
+
+        tokenizer = llm.tokenizer
+        stack.enter_context(
+            patch.object(tokenizer, "encode", self.timed("tokenizer", tokenizer.encode))
+        )
+
+
+async def run_manus(client: ScriptedClient, args: argparse.Namespace) -> Any:
+    agent = Manus(llm=build_llm("benchmark-manus", client), max_steps=args.steps + 1)
+    agent.available_tools = stub_tools(
+        agent.available_tools, args.output_size, args.screenshot_size
+    )
+    return agent, agent.run("Summarize the benchmark results.")
+
+
+async def run_browser(client: ScriptedClient, args: argparse.Namespace) -> Any:
+    agent = BrowserAgent(
+        llm=build_llm("benchmark-browser", client), max_steps=args.steps + 1
+    )
+    agent.available_tools = stub_tools(
+        agent.available_tools, args.output_size, args.screenshot_size
+    )
+    return agent, agent.run("Open example.com and read the page.")
+
+
+async def run_mcp(client: ScriptedClient, args: argparse.Namespace) -> Any:
+    agent = MCPAgent(llm=build_llm("benchmark-mcp", client), max_steps=args.steps + 1)
+    server_tools = [
+        StubTool(name=name, description=f"Remote {name} tool", parameters=None)
+        for name in ("read_file", "list_files", "run_query", "terminate")
+    ]
+    agent.mcp_clients.session = StubMCPSession(server_tools, "x" * args.output_size)
+    await agent.mcp_clients._initialize_and_list_tools()
+    agent.available_tools = agent.mcp_clients
+    await agent._refresh_tools()
+    return agent, agent.run("Inspect the remote files.")
+
+
+async def run_planning(client: ScriptedClient, args: argparse.Namespace) -> Any:
+    agent = Manus(llm=build_llm("benchmark-planning", client), max_steps=args.steps + 1)
+    agent.available_tools = stub_tools(
+        agent.available_tools, args.output_size, args.screenshot_size
+    )
+    flow = PlanningFlow(agent, llm=agent.llm)
+    return agent, flow.execute("Write a short report on the benchmark.")
+
+
+SCENARIOS: Dict[str, Callable[..., Awaitable[Any]]] = {
+    "manus": run_manus,
+    "browser": run_browser,
+    "mcp": run_mcp,
+    "planning": run_planning,
+}
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {}
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "p50": round(pick(0.5) * 1000, 3),
+        "p90": round(pick(0.9) * 1000, 3),
+        "p99": round(pick(0.99) * 1000, 3),
+        "mean": round(statistics.fmean(ordered) * 1000, 3),
+        "max": round(ordered[-1] * 1000, 3),
+    }
+
+
+async def run_scenario(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    profiler = Profiler()
+    for _ in range(args.repeat):
+        client = ScriptedClient(args.steps, args.plan_steps, args.llm_latency)
+        agent, run = await SCENARIOS[name](client, args)
+        with ExitStack() as stack:
+            profiler.instrument(stack, agent.llm)
+            await run
+
+    # A separate traced run, as tracemalloc would skew the timings above
+    client = ScriptedClient(args.steps, args.plan_steps, args.llm_latency)
+    agent, run = await SCENARIOS[name](client, args)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    await run
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    steps = len(profiler.step_times) or 1
+    return {
+        "runs": args.repeat,
+        "steps": len(profiler.step_times),
+        "step_ms": percentiles(profiler.step_times),
+        "per_step_ms": {
+            category: round(total * 1000 / steps, 3)
+            for category, total in sorted(profiler.totals.items())
+            if category != "step"
+        },
+        "calls_per_step": {
+            category: round(count / steps, 2)
+            for category, count in sorted(profiler.calls.items())
+            if category != "step"
+        },
+        "llm_requests": client.requests,
+        "messages": len(agent.memory.messages),
+        "memory_tokens": agent.memory.count_tokens(),
+        "memory_growth_kb": round((current - before) / 1024, 1),
+        "memory_peak_kb": round((peak - before) / 1024, 1),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Print relative changes against a previous results file"""
+
+    def change(new: float, old: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"Compared with {baseline['meta']['revision']}:")
+    for name, scenario in results["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if not old:
+            continue
+        print(
+            f"  {name}: step p50 {scenario['step_ms']['p50']}ms "
+            f"({change(scenario['step_ms']['p50'], old['step_ms']['p50'])}), "
+            f"p90 {change(scenario['step_ms']['p90'], old['step_ms']['p90'])}"
+        )
+        for category, value in scenario["per_step_ms"].items():
+            if category in old["per_step_ms"]:
+                print(
+                    f"    {category}: {value}ms "
+                    f"({change(value, old['per_step_ms'][category])})"
+                )
+
+
+async def main(args: argparse.Namespace) -> None:
+    if not args.verbose:
+        logger.remove()
+
+    results = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "settings": {
+                key: value
+                for key, value in vars(args).items()
+                if key not in ("output", "baseline", "verbose", "scenarios")
+            },
+        },
+        "scenarios": {},
+    }
+    with ExitStack() as stack:
+        results["meta"]["tokenizer"] = ensure_tokenizer(stack)
+        for name in args.scenarios:
+            results["scenarios"][name] = await run_scenario(name, args)
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per scenario")
+    parser.add_argument("--steps", type=int, default=10, help="Tool steps per run")
+    parser.add_argument("--plan-steps", type=int, default=3)
+    parser.add_argument("--output-size", type=int, default=2000)
+    parser.add_argument("--screenshot-size", type=int, default=0)
+    parser.add_argument("--llm-latency", type=float, default=0.0)
+    parser.add_argument("--output", help="Write results to this file")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Keep agent logging")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,102 @@
+"""
+Benchmark the Bedrock backend against a local stub that emits delayed events.
+
+Runs several concurrent streaming and non-streaming calls and reports total
+wall time and the worst event loop lag seen by a ticker coroutine. With the
+blocking calls offloaded, wall time stays close to a single call and lag stays
+near the ticker interval.
+
+Usage:
+    python -m examples.benchmarks.bedrock_offload --concurrency 8 --events 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.bedrock import ChatCompletions
+
+
+TICK_INTERVAL = 0.005
+
+
+class DelayedBedrockStub:
+    """Blocking stand-in for the boto3 bedrock-runtime client."""
+
+    def __init__(self, delay: float, events: int):
+        self.delay = delay
+        self.events = events
+
+    def converse(self, **kwargs):
+        time.sleep(self.delay * self.events)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": "ok"}]}},
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": 1, "outputTokens": 1, "totalTokens": 2},
+        }
+
+    def converse_stream(self, **kwargs):
+        def stream():
+            yield {"messageStart": {"role": "assistant"}}
+            for _ in range(self.events):
+                time.sleep(self.delay)
+                yield {"contentBlockDelta": {"delta": {"text": "."}}}
+            yield {"contentBlockStop": {"contentBlockIndex": 0}}
+
+        return {"stream": stream()}
+
+
+async def run_case(
+    completions: ChatCompletions, concurrency: int, stream: bool
+) -> dict:
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal max_lag
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(TICK_INTERVAL)
+            max_lag = max(max_lag, time.perf_counter() - started - TICK_INTERVAL)
+
+    ticker_task = asyncio.create_task(ticker())
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            completions.create(
+                model="stub",
+                messages=[{"role": "user", "content": "hello"}],
+                max_tokens=16,
+                temperature=0.0,
+                stream=stream,
+            )
+            for _ in range(concurrency)
+        )
+    )
+    wall_time = time.perf_counter() - started
+    done.set()
+    await ticker_task
+
+    return {
+        "stream": stream,
+        "concurrency": concurrency,
+        "wall_time_s": round(wall_time, 4),
+        "max_loop_lag_ms": round(max_lag * 1000, 2),
+    }
+
+
+async def main(concurrency: int, events: int, delay: float) -> None:
+    completions = ChatCompletions(DelayedBedrockStub(delay=delay, events=events))
+    results = [
+        await run_case(completions, concurrency, stream) for stream in (False, True)
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.01)
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.events, args.delay))
@@ -0,0 +1,186 @@
+"""
+Benchmark HTML-to-text extraction over the saved pages in tests/fixtures/html.
+
+Each page is padded with extra article sections up to --page-size bytes, then
+extracted with BeautifulSoup's html.parser (what WebContentFetcher used),
+markdownify (what BrowserUseTool used, if installed), lxml inline, and lxml in
+the HTMLExtractor process pool. For every method it reports throughput, the
+peak Python memory of the calling process, and the longest event loop stall
+seen while the pages were being extracted concurrently, plus the peak RSS of
+the pool workers.
+
+Usage:
+    python -m examples.benchmarks.html_extraction --page-size 2000000
+    python -m examples.benchmarks.html_extraction --output extraction.json
+"""
+import argparse
+import asyncio
+import json
+import resource
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from bs4 import BeautifulSoup
+
+from app.extraction import HTMLExtractor, extract_page
+
+
+CORPUS = Path(__file__).resolve().parents[2] / "tests" / "fixtures" / "html"
+
+SECTION = (
+    "<div class='section'><h2>Section {i}</h2>"
+    "<p>Paragraph {i} explains, in some detail, how the service behaves under load, "
+    "which parts of a request take the longest, and what was changed to fix it.</p>"
+    "<p>It links to <a href='/notes/{i}'>the notes</a> and ends with a short "
+    "summary, a few numbers, and a list of follow-up items for the team.</p></div>"
+)
+
+
+def load_corpus(page_size: int) -> Dict[str, str]:
+    pages = {}
+    for path in sorted(CORPUS.glob("*.html")):
+        html = path.read_text(encoding="utf-8")
+        sections = []
+        size = len(html)
+        while size < page_size:
+            sections.append(SECTION.format(i=len(sections)))
+            size += len(sections[-1])
+        pages[path.stem] = html.replace("</body>", "".join(sections) + "</body>")
+    return pages
+
+
+def with_bs4(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "header", "footer", "nav"]):
+        tag.extract()
+    return soup.get_text(separator="\n", strip=True)
+
+
+def with_markdownify() -> Optional[Callable[[str], str]]:
+    try:
+        import markdownify
+    except ImportError:
+        return None
+    return markdownify.markdownify
+
+
+def in_thread(func: Callable[[str], object]) -> Callable[[str], Awaitable[object]]:
+    """What the old code did: parse in the default executor, or on the loop"""
+
+    async def run(html: str) -> object:
+        return await asyncio.get_running_loop().run_in_executor(None, func, html)
+
+    return run
+
+
+async def inline(html: str) -> object:
+    return extract_page(html)
+
+
+async def pooled(html: str) -> object:
+    return await HTMLExtractor.extract(html)
+
+
+def worker_max_rss() -> int:
+    """Peak RSS of the pool worker running this, in KiB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+async def measure_lag(stop: asyncio.Event) -> float:
+    """Longest delay of a 1 ms timer while other work runs on the loop"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst = max(worst, time.perf_counter() - started - 0.001)
+    return worst
+
+
+async def run_method(
+    extract: Callable[[str], Awaitable[object]], pages: List[str], repeat: int
+) -> Dict[str, float]:
+    # Warm up, which also starts pool workers outside the timed section
+    await extract(pages[0])
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await asyncio.gather(*(extract(html) for html in pages))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lag = await lag_task
+
+    # A separate traced round, as tracemalloc would skew the timings above
+    tracemalloc.start()
+    await asyncio.gather(*(extract(html) for html in pages))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    count = len(pages) * repeat
+    megabytes = sum(len(html) for html in pages) * repeat / 1e6
+    return {
+        "pages_per_s": round(count / elapsed, 2),
+        "mb_per_s": round(megabytes / elapsed, 2),
+        "peak_python_mb": round(peak / 1e6, 1),
+        "max_loop_stall_ms": round(lag * 1000, 1),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    corpus = load_corpus(args.page_size)
+    pages = list(corpus.values()) * args.copies
+    methods: Dict[str, Callable[[str], Awaitable[object]]] = {
+        "bs4_html_parser": in_thread(with_bs4),
+        "lxml_inline": inline,
+        "lxml_process_pool": pooled,
+    }
+    markdownify = with_markdownify()
+    if markdownify:
+        methods["markdownify"] = in_thread(markdownify)
+
+    HTMLExtractor.inline_limit = 0
+    results = {
+        "corpus": {name: len(html) for name, html in corpus.items()},
+        "pages_per_round": len(pages),
+        "workers": HTMLExtractor.max_workers,
+        "methods": {},
+    }
+    try:
+        for name, extract in methods.items():
+            results["methods"][name] = await run_method(extract, pages, args.repeat)
+        # Workers aren't direct children with forkserver, so ask them
+        loop = asyncio.get_running_loop()
+        pool = HTMLExtractor._get_pool()
+        worker_rss = await asyncio.gather(
+            *(
+                loop.run_in_executor(pool, worker_max_rss)
+                for _ in range(HTMLExtractor.max_workers)
+            )
+        )
+        results["worker_max_rss_mb"] = round(max(worker_rss) / 1024, 1)
+    finally:
+        HTMLExtractor.shutdown(wait=True)
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--page-size", type=int, default=1_000_000, help="Bytes per padded page"
+    )
+    parser.add_argument(
+        "--copies", type=int, default=4, help="Copies of the corpus per round"
+    )
+    parser.add_argument("--repeat", type=int, default=2, help="Timed rounds")
+    parser.add_argument("--output", help="Write results to this file")
+    asyncio.run(main(parser.parse_args()))
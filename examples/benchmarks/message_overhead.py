@@ -0,0 +1,99 @@
+"""
+Microbenchmark the cost of creating and serializing Message objects.
+
+Times the Message factories used on every agent step, to_dict, and formatting
+a fresh and an already formatted message, in microseconds per operation.
+Results are printed as JSON; run it on two commits and pass the earlier
+results file with --baseline to see the difference.
+
+Usage:
+    python -m examples.benchmarks.message_overhead --output before.json
+    python -m examples.benchmarks.message_overhead --baseline before.json
+"""
+import argparse
+import json
+import timeit
+from typing import Callable, Dict
+
+from openai.types.chat import ChatCompletionMessageToolCall
+
+from app.llm import LLM
+from app.schema import Function, Message, ToolCall
+
+
+OBSERVATION = "Observed output of `python_execute`:\n" + "result line\n" * 40
+
+
+def cases() -> Dict[str, Callable[[], object]]:
+    calls = [
+        ToolCall(
+            id=f"call_{i}",
+            function=Function(name="python_execute", arguments='{"code": "1 + 1"}'),
+        )
+        for i in range(2)
+    ]
+    # What ToolCallAgent.think passes on: the tool calls of an API response
+    api_calls = [
+        ChatCompletionMessageToolCall.model_validate(call.model_dump())
+        for call in calls
+    ]
+    assistant = Message.from_tool_calls(tool_calls=calls, content="Running code")
+    observation = Message.tool_message(
+        OBSERVATION, name="python_execute", tool_call_id="call_0"
+    )
+    observation.to_formatted_dict()
+
+    return {
+        "user_message": lambda: Message.user_message("Continue with the task"),
+        "tool_message": lambda: Message.tool_message(
+            OBSERVATION, name="python_execute", tool_call_id="call_0"
+        ),
+        "from_tool_calls": lambda: Message.from_tool_calls(
+            tool_calls=calls, content="Running code"
+        ),
+        "from_api_tool_calls": lambda: Message.from_tool_calls(
+            tool_calls=api_calls, content="Running code"
+        ),
+        "to_dict": assistant.to_dict,
+        "format_new": lambda: LLM.format_messages(
+            [Message.tool_message(OBSERVATION, name="bash", tool_call_id="call_0")]
+        ),
+        "format_cached": lambda: LLM.format_messages([observation]),
+    }
+
+
+def measure(number: int, repeat: int) -> Dict[str, float]:
+    results = {}
+    for name, case in cases().items():
+        best = min(timeit.repeat(case, number=number, repeat=repeat))
+        results[name] = round(best / number * 1e6, 3)
+    return results
+
+
+def main(args: argparse.Namespace) -> None:
+    results = measure(args.number, args.repeat)
+    print(json.dumps({"us_per_op": results}, indent=2))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"us_per_op": results}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["us_per_op"]
+        for name, value in results.items():
+            if baseline.get(name):
+                print(
+                    f"{name}: {baseline[name]} -> {value} us ({baseline[name] / value:.1f}x)"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--number", type=int, default=20000, help="Calls per sample")
+    parser.add_argument("--repeat", type=int, default=5, help="Samples per case")
+    parser.add_argument("--output", help="Write results to this file")
+    parser.add_argument("--baseline", help="Results file to compare against")
+    main(parser.parse_args())
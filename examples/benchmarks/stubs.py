@@ -0,0 +1,267 @@
+"""
+Offline stand-ins for the LLM endpoint, tools and MCP server used by benchmarks.
+
+They do no real work, so timings taken with them measure only the framework:
+prompt formatting, token counting, memory handling and tool dispatch.
+"""
+import asyncio
+import base64
+import json
+from contextlib import ExitStack
+from typing import Any, Dict, List, Optional
+from unittest.mock import patch
+
+import tiktoken
+from mcp import ClientSession
+from mcp.types import CallToolResult, ListToolsResult, TextContent, Tool
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from app.config import LLMSettings
+from app.llm import LLM
+from app.tool import ToolCollection
+from app.tool.base import BaseTool, ToolResult
+
+
+BENCHMARK_MODEL = "gpt-4o"
+
+
+class ScriptedClient:
+    """
+    OpenAI-compatible client that answers every request with a scripted reply.
+
+    Requests that offer tools get a call to one of them, cycling through the
+    offered tools, and every `calls_per_task + 1`th one gets a `terminate` call so
+    each agent run ends after `calls_per_task` steps. A `planning` request gets a
+    plan with `plan_steps` steps. Requests without tools get a short answer.
+    """
+
+    def __init__(
+        self, calls_per_task: int = 5, plan_steps: int = 3, latency: float = 0.0
+    ):
+        self.calls_per_task = calls_per_task
+        self.plan_steps = plan_steps
+        self.latency = latency
+        self.requests = 0
+        self._tool_requests = 0
+        self.chat = self
+        self.completions = self
+
+    async def create(self, **params) -> Any:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        message = self._next_message(params.get("tools"))
+        if params.get("stream"):
+            return self._stream(message)
+        return ChatCompletion.model_validate(
+            {
+                "id": f"bench-{self.requests}",
+                "created": 0,
+                "model": BENCHMARK_MODEL,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+                "usage": {
+                    "prompt_tokens": 100,
+                    "completion_tokens": 20,
+                    "total_tokens": 120,
+                },
+            }
+        )
+
+    def _next_message(self, tools: Optional[List[dict]]) -> Dict[str, Any]:
+        if not tools:
+            return {"role": "assistant", "content": "All steps are complete."}
+
+        functions = {tool["function"]["name"]: tool["function"] for tool in tools}
+        index = self._tool_requests
+
+        if "planning" in functions:
+            name = "planning"
+            arguments = {
+                "command": "create",
+                "title": "Benchmark plan",
+                "steps": [f"Step {i + 1}" for i in range(self.plan_steps)],
+            }
+        elif "terminate" in functions and (index + 1) % (self.calls_per_task + 1) == 0:
+            name, arguments = "terminate", {"status": "success"}
+        else:
+            names = [name for name in functions if name != "terminate"] or list(
+                functions
+            )
+            name = names[index % len(names)]
+            arguments = self._sample_arguments(functions[name].get("parameters"))
+        if name != "planning":
+            # Plan creation doesn't count towards an executor's task
+            self._tool_requests += 1
+
+        return {
+            "role": "assistant",
+            "content": f"Calling {name}.",
+            "tool_calls": [
+                {
+                    "id": f"call_{index}",
+                    "type": "function",
+                    "function": {"name": name, "arguments": json.dumps(arguments)},
+                }
+            ],
+        }
+
+    @staticmethod
+    def _sample_arguments(parameters: Optional[dict]) -> Dict[str, Any]:
+        properties = (parameters or {}).get("properties", {})
+        arguments = {}
+        for name in (parameters or {}).get("required", []):
+            schema = properties.get(name, {})
+            if schema.get("enum"):
+                arguments[name] = schema["enum"][0]
+            elif schema.get("type") == "integer":
+                arguments[name] = 1
+            else:
+                arguments[name] = "benchmark"
+        return arguments
+
+    async def _stream(self, message: Dict[str, Any]):
+        yield self._chunk({"role": "assistant", "content": message["content"]})
+        for i, tool_call in enumerate(message.get("tool_calls") or []):
+            yield self._chunk({"tool_calls": [{"index": i, **tool_call}]})
+
+    def _chunk(self, delta: Dict[str, Any]) -> ChatCompletionChunk:
+        return ChatCompletionChunk.model_validate(
+            {
+                "id": f"bench-{self.requests}",
+                "created": 0,
+                "model": BENCHMARK_MODEL,
+                "object": "chat.completion.chunk",
+                "choices": [{"index": 0, "delta": delta}],
+            }
+        )
+
+
+class StubTool(BaseTool):
+    """Tool with the schema of a real tool that returns a fixed output."""
+
+    output: str = ""
+
+    async def execute(self, **kwargs) -> ToolResult:
+        return ToolResult(output=self.output)
+
+
+class StubBrowserTool(StubTool):
+    """Browser tool stand-in that also reports a fixed page state and screenshot."""
+
+    screenshot: Optional[str] = None
+
+    async def get_current_state(self) -> ToolResult:
+        state = {
+            "url": "https://example.com/",
+            "title": "Example Domain",
+            "tabs": [{"page_id": 0, "url": "https://example.com/", "title": "Example"}],
+            "pixels_above": 0,
+            "pixels_below": 1200,
+        }
+        return ToolResult(output=json.dumps(state), base64_image=self.screenshot)
+
+    async def cleanup(self) -> None:
+        pass
+
+
+class StubMCPSession(ClientSession):
+    """In-process stand-in for an MCP client session."""
+
+    def __init__(self, tools: List[BaseTool], output: str = ""):
+        # No streams to set up, so the base initializer is skipped
+        self.tools = [
+            Tool(
+                name=tool.name,
+                description=tool.description,
+                inputSchema=tool.parameters or {"type": "object"},
+            )
+            for tool in tools
+        ]
+        self.output = output
+
+    async def initialize(self) -> None:
+        pass
+
+    async def list_tools(self) -> ListToolsResult:
+        return ListToolsResult(tools=self.tools)
+
+    async def call_tool(self, name: str, arguments: dict) -> CallToolResult:
+        return CallToolResult(content=[TextContent(type="text", text=self.output)])
+
+
+def stub_tools(
+    tools: ToolCollection, output_size: int = 2000, screenshot_size: int = 0
+) -> ToolCollection:
+    """Replace every tool but `terminate` with a stub of the same schema"""
+    output = "x" * output_size
+    screenshot = (
+        base64.b64encode(b"\0" * screenshot_size).decode() if screenshot_size else None
+    )
+    stubs = []
+    for tool in tools:
+        if tool.name == "terminate":
+            stubs.append(tool)
+            continue
+        fields = dict(
+            name=tool.name,
+            description=tool.description,
+            parameters=tool.parameters,
+            parallel_safe=tool.parallel_safe,
+            output=output,
+        )
+        stubs.append(
+            StubBrowserTool(**fields, screenshot=screenshot)
+            if tool.name == "browser_use"
+            else StubTool(**fields)
+        )
+    return ToolCollection(*stubs)
+
+
+class WordTokenizer:
+    """Fallback tokenizer for machines without a cached tiktoken encoding."""
+
+    name = "words"
+
+    def encode(self, text: str) -> List[str]:
+        return text.split()
+
+
+def ensure_tokenizer(stack: ExitStack) -> str:
+    """
+    Make tiktoken usable offline for the duration of stack.
+
+    Uses the real encoding when it can be loaded, so tokenizer cost is
+    representative, and otherwise makes tiktoken hand out `WordTokenizer`.
+    Returns the name of the tokenizer in use.
+    """
+    try:
+        return tiktoken.encoding_for_model(BENCHMARK_MODEL).name
+    except Exception:
+        tokenizer = WordTokenizer()
+        stack.enter_context(
+            patch.object(tiktoken, "encoding_for_model", return_value=tokenizer)
+        )
+        stack.enter_context(
+            patch.object(tiktoken, "get_encoding", return_value=tokenizer)
+        )
+        return tokenizer.name
+
+
+def build_llm(name: str, client: ScriptedClient) -> LLM:
+    """Create an LLM that sends its requests to `client`"""
+    settings = LLMSettings(
+        model=BENCHMARK_MODEL,
+        base_url="http://benchmark.invalid/v1",
+        api_key="benchmark",
+        max_tokens=4096,
+        temperature=0.0,
+        api_type="openai",
+        api_version="",
+    )
+    llm = LLM(config_name=name, llm_config={"default": settings, name: settings})
+    llm.client = client
+    llm.response_cache = None
+    llm.total_input_tokens = llm.total_completion_tokens = 0
+    return llm
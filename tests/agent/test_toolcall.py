@@ -0,0 +1,245 @@
+import asyncio
+import time
+from typing import ClassVar, Dict, List
+
+import pytest
+from tenacity import wait_none
+
+from app.agent.toolcall import ToolCallAgent
+from app.llm import LLM
+from app.schema import Function, Message, ToolCall
+from app.tool.base import BaseTool
+from app.tool.tool_collection import ToolCollection
+from tests.conftest import StreamingClient, make_chunk
+
+
+class RecordingSearch(BaseTool):
+    """Fake web search that records when each query started."""
+
+    name: str = "web_search"
+    description: str = "Search the web."
+    parameters: dict = {
+        "type": "object",
+        "properties": {"query": {"type": "string"}},
+    }
+    started: Dict[str, float] = {}
+
+    async def execute(self, query: str) -> str:
+        self.started[query] = time.perf_counter()
+        return f"results for {query}"
+
+
+def _search_call_chunks(queries: List[str], start: int = 0) -> list:
+    chunks = []
+    for index, query in enumerate(queries, start):
+        chunks.append(
+            make_chunk(
+                tool_call={
+                    "index": index,
+                    "id": f"call_{index}",
+                    "type": "function",
+                    "function": {"name": "web_search", "arguments": "{"},
+                }
+            )
+        )
+        chunks.append(
+            make_chunk(
+                tool_call={
+                    "index": index,
+                    "function": {"arguments": f'"query": "{query}"}}'},
+                }
+            )
+        )
+    return chunks
+
+
+@pytest.mark.asyncio
+async def test_streamed_tool_calls_start_before_response_ends(offline_llm: LLM):
+    """Tests that a finished tool call runs while later calls still stream."""
+    offline_llm.client = StreamingClient(
+        _search_call_chunks(["tokyo", "kyoto"]), delay=0.05
+    )
+    search = RecordingSearch()
+    agent = ToolCallAgent(
+        llm=offline_llm,
+        available_tools=ToolCollection(search),
+        stream_tool_calls=True,
+    )
+
+    assert await agent.think()
+    think_done = time.perf_counter()
+    result = await agent.act()
+
+    assert search.started["tokyo"] < think_done
+    assert result == (
+        "Observed output of cmd `web_search` executed:\nresults for tokyo\n\n"
+        "Observed output of cmd `web_search` executed:\nresults for kyoto"
+    )
+    tool_messages = [m for m in agent.memory.messages if m.role == "tool"]
+    assert [m.tool_call_id for m in tool_messages] == ["call_0", "call_1"]
+
+
+class FailingStreamClient(StreamingClient):
+    """Streams one response that breaks off, then streams the given chunks."""
+
+    def __init__(self, broken: list, chunks: list):
+        super().__init__(chunks)
+        self.broken = broken
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        if self.calls > 1:
+            return await super().create(**params)
+
+        async def stream():
+            for chunk in self.broken:
+                yield chunk
+            raise ConnectionError("stream interrupted")
+
+        return stream()
+
+
+@pytest.mark.asyncio
+async def test_retried_stream_results_match_final_tool_calls(
+    offline_llm: LLM, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that calls dispatched by a failed stream don't answer the retry."""
+    monkeypatch.setattr(LLM.ask_tool.retry, "wait", wait_none())
+    offline_llm.client = FailingStreamClient(
+        _search_call_chunks(["stale", "other"])[:3], _search_call_chunks(["fresh"])
+    )
+    agent = ToolCallAgent(
+        llm=offline_llm,
+        available_tools=ToolCollection(RecordingSearch()),
+        stream_tool_calls=True,
+    )
+
+    assert await agent.think()
+    await agent.act()
+
+    tool_messages = [m for m in agent.memory.messages if m.role == "tool"]
+    assert len(tool_messages) == 1
+    assert tool_messages[0].tool_call_id == "call_0"
+    assert tool_messages[0].content.endswith("results for fresh")
+
+
+class SlowTool(BaseTool):
+    """Fake tool that tracks how many of its calls overlap."""
+
+    name: str = "slow"
+    description: str = "Wait a little, then echo."
+    parameters: dict = {"type": "object", "properties": {"text": {"type": "string"}}}
+    running: int = 0
+    peak: int = 0
+    log: ClassVar[List[str]] = []
+
+    async def execute(self, text: str) -> str:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        self.log.append(f"start {text}")
+        await asyncio.sleep(0.02)
+        self.running -= 1
+        self.log.append(f"end {text}")
+        return text
+
+
+def _call(index: int, name: str, text: str) -> ToolCall:
+    return ToolCall(
+        id=f"call_{index}",
+        function=Function(name=name, arguments=f'{{"text": "{text}"}}'),
+    )
+
+
+@pytest.mark.asyncio
+async def test_parallel_tool_calls_respect_cap_and_exclusive_tools(
+    offline_llm: LLM,
+):
+    """Tests concurrent execution, the concurrency cap and exclusive barriers."""
+    SlowTool.log.clear()
+    shared = SlowTool()
+    exclusive = SlowTool(name="exclusive", parallel_safe=False)
+    agent = ToolCallAgent(
+        llm=offline_llm,
+        available_tools=ToolCollection(shared, exclusive),
+        parallel_tool_calls=True,
+        max_parallel_tool_calls=2,
+    )
+    agent.tool_calls = [
+        _call(0, "slow", "a"),
+        _call(1, "slow", "b"),
+        _call(2, "slow", "c"),
+        _call(3, "exclusive", "x"),
+        _call(4, "slow", "d"),
+    ]
+
+    await agent.act()
+
+    assert shared.peak == 2
+    log = SlowTool.log
+    assert log.index("start x") > max(log.index(f"end {t}") for t in "abc")
+    assert log.index("start d") > log.index("end x")
+    tool_messages = [m for m in agent.memory.messages if m.role == "tool"]
+    assert [m.tool_call_id for m in tool_messages] == [f"call_{i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_tool_calls_run_sequentially_by_default(offline_llm: LLM):
+    """Tests that calls never overlap unless parallel mode is enabled."""
+    SlowTool.log.clear()
+    tool = SlowTool()
+    agent = ToolCallAgent(llm=offline_llm, available_tools=ToolCollection(tool))
+    agent.tool_calls = [_call(i, "slow", str(i)) for i in range(3)]
+
+    await agent.act()
+
+    assert tool.peak == 1
+    assert SlowTool.log == ["start 0", "end 0", "start 1", "end 1", "start 2", "end 2"]
+
+
+def test_repeated_tool_calls_mark_agent_stuck(offline_llm: LLM):
+    """Tests that calling the same tool with the same arguments is detected."""
+    agent = ToolCallAgent(llm=offline_llm)
+    for step in range(3):
+        agent.memory.add_message(
+            Message.from_tool_calls(
+                tool_calls=[_call(step, "web_search", "same query")],
+                content=f"Searching, attempt {step}",
+            )
+        )
+        assert agent.is_stuck() == (step >= agent.duplicate_threshold)
+
+
+@pytest.mark.asyncio
+async def test_exclusive_streamed_calls_wait_for_act(offline_llm: LLM):
+    """Tests that an exclusive call and the calls after it don't start early."""
+    SlowTool.log.clear()
+    exclusive_call = make_chunk(
+        tool_call={
+            "index": 0,
+            "id": "call_x",
+            "type": "function",
+            "function": {"name": "exclusive", "arguments": '{"text": "x"}'},
+        }
+    )
+    offline_llm.client = StreamingClient(
+        [exclusive_call, *_search_call_chunks(["kyoto"], start=1)], delay=0.02
+    )
+    search = RecordingSearch()
+    agent = ToolCallAgent(
+        llm=offline_llm,
+        available_tools=ToolCollection(
+            SlowTool(name="exclusive", parallel_safe=False), search
+        ),
+        stream_tool_calls=True,
+    )
+
+    assert await agent.think()
+    assert not SlowTool.log and not search.started
+    result = await agent.act()
+
+    assert SlowTool.log == ["start x", "end x"]
+    assert result == (
+        "Observed output of cmd `exclusive` executed:\nx\n\n"
+        "Observed output of cmd `web_search` executed:\nresults for kyoto"
+    )
@@ -0,0 +1,114 @@
+import asyncio
+from typing import List
+
+import pytest
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from app.llm import LLM, TokenCounter
+
+
+class WhitespaceTokenizer:
+    """Deterministic offline stand-in for a tiktoken encoding."""
+
+    name = "whitespace"
+
+    def __init__(self):
+        self.encode_calls = 0
+
+    def encode(self, text: str) -> List[str]:
+        self.encode_calls += 1
+        return text.split()
+
+
+def make_chunk(content: str = None, tool_call: dict = None) -> ChatCompletionChunk:
+    delta = {"content": content}
+    if tool_call:
+        delta["tool_calls"] = [tool_call]
+    return ChatCompletionChunk.model_validate(
+        {
+            "id": "chunk",
+            "created": 0,
+            "model": "offline",
+            "object": "chat.completion.chunk",
+            "choices": [{"index": 0, "delta": delta}],
+        }
+    )
+
+
+class StreamingClient:
+    """Stand-in for AsyncOpenAI that streams a fixed list of chunks."""
+
+    def __init__(self, chunks: List[ChatCompletionChunk], delay: float = 0.0):
+        self.chunks = chunks
+        self.delay = delay
+        self.chat = self
+        self.completions = self
+
+    async def create(self, **params):
+        assert params["stream"] is True
+
+        async def stream():
+            for chunk in self.chunks:
+                await asyncio.sleep(self.delay)
+                yield chunk
+
+        return stream()
+
+
+class CountingClient:
+    """Stand-in for AsyncOpenAI that returns one fixed completion."""
+
+    def __init__(self, message: dict):
+        self.message = message
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    async def create(self, **params):
+        self.calls += 1
+        return ChatCompletion.model_validate(
+            {
+                "id": "completion",
+                "created": 0,
+                "model": "offline",
+                "object": "chat.completion",
+                "choices": [
+                    {"index": 0, "finish_reason": "stop", "message": self.message}
+                ],
+                "usage": {
+                    "prompt_tokens": 3,
+                    "completion_tokens": 2,
+                    "total_tokens": 5,
+                },
+            }
+        )
+
+
+@pytest.fixture
+def tokenizer() -> WhitespaceTokenizer:
+    return WhitespaceTokenizer()
+
+
+@pytest.fixture
+def counter(tokenizer: WhitespaceTokenizer) -> TokenCounter:
+    TokenCounter.clear_cache()
+    return TokenCounter(tokenizer)
+
+
+@pytest.fixture
+def offline_llm(counter: TokenCounter) -> LLM:
+    """An LLM that needs no config, tokenizer download or endpoint; set .client."""
+    llm = object.__new__(LLM)
+    llm.model = "offline"
+    llm.max_tokens = 256
+    llm.temperature = 0.0
+    llm.api_type = "openai"
+    llm.total_input_tokens = 0
+    llm.total_completion_tokens = 0
+    llm.max_input_tokens = None
+    llm.tokenizer = counter.tokenizer
+    llm.token_counter = counter
+    llm.base_url = "http://offline"
+    llm.response_cache = None
+    llm.client = None
+    return llm
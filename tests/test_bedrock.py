@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from app.bedrock import ChatCompletions
+
+
+class DelayedBedrockStub:
+    """Blocking stand-in for the boto3 bedrock-runtime client."""
+
+    def __init__(self, delay: float = 0.05, events: int = 4):
+        self.delay = delay
+        self.events = events
+
+    def converse(self, **kwargs):
+        time.sleep(self.delay * self.events)
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": "hi"}]}},
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": 3, "outputTokens": 1, "totalTokens": 4},
+        }
+
+    def converse_stream(self, **kwargs):
+        def stream():
+            yield {"messageStart": {"role": "assistant"}}
+            for _ in range(self.events):
+                time.sleep(self.delay)
+                yield {"contentBlockDelta": {"delta": {"text": "hi "}}}
+            yield {"contentBlockStop": {"contentBlockIndex": 0}}
+
+        return {"stream": stream()}
+
+
+async def _count_ticks(call) -> int:
+    """Runs call while counting how often a 5ms ticker gets scheduled."""
+    ticks = 0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal ticks
+        while not done.is_set():
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    task = asyncio.create_task(ticker())
+    try:
+        return await call, ticks
+    finally:
+        done.set()
+        await task
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stream", [False, True])
+async def test_bedrock_calls_do_not_block_event_loop(stream: bool):
+    """Tests that other coroutines keep running during a Bedrock call."""
+    completions = ChatCompletions(DelayedBedrockStub())
+
+    response, ticks = await _count_ticks(
+        completions.create(
+            model="stub",
+            messages=[{"role": "user", "content": "hello"}],
+            max_tokens=16,
+            temperature=0.0,
+            stream=stream,
+        )
+    )
+
+    assert response.choices[0].message.content.startswith("hi")
+    # 200ms of blocking work would allow a single tick if run on the loop
+    assert ticks >= 10
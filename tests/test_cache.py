@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app.cache import SQLiteCache, TTLCache
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    """Tests that entries older than the TTL are treated as missing."""
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = TTLCache(ttl=10)
+    cache.set("key", {"value": 1})
+
+    now[0] += 5
+    assert cache.get("key") == {"value": 1}
+    now[0] += 10
+    assert cache.get("key") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 0}
+
+
+def test_least_recently_used_entry_is_evicted():
+    """Tests that the in-memory cache drops the least recently used entry."""
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entries_persist_on_disk(tmp_path):
+    """Tests that a new cache on the same directory sees stored entries."""
+    cache = TTLCache(max_entries=2, directory=tmp_path)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.set(key, [i])
+        os.utime(tmp_path / f"{key}.json", (i, i))
+
+    reopened = TTLCache(max_entries=2, directory=tmp_path)
+    assert reopened.get("a") is None
+    assert reopened.get("c") == [2]
+    assert len(list(tmp_path.glob("*.json"))) == 2
+
+
+def test_sqlite_cache_is_shared_and_bounded(tmp_path):
+    """Tests that SQLite-backed entries are visible to other instances."""
+    path = tmp_path / "cache.sqlite"
+    writer = SQLiteCache(path, max_entries=2, ttl=60)
+    for i, key in enumerate(["a", "b", "c"]):
+        writer.set(key, {"value": i})
+
+    reader = SQLiteCache(path, max_entries=2, ttl=60)
+    assert reader.get("a") is None
+    assert reader.get("c") == {"value": 2}
+
+    writer.clear()
+    assert SQLiteCache(path).get("b") is None
+
+
+def test_sqlite_cache_evicts_beyond_size_limit(tmp_path):
+    """Tests that least recently used entries go once values exceed max_bytes."""
+    cache = SQLiteCache(tmp_path / "cache.sqlite", max_bytes=250)
+    for key in ("a", "b", "c"):
+        cache.set(key, "x" * 100)
+
+    reader = SQLiteCache(tmp_path / "cache.sqlite")
+    assert reader.get("a") is None
+    assert reader.get("b") == reader.get("c") == "x" * 100
+
+
+@pytest.mark.asyncio
+async def test_persistent_cache_is_read_off_the_event_loop(tmp_path):
+    """Tests that the async accessors do disk I/O in a worker thread."""
+    cache = SQLiteCache(tmp_path / "cache.sqlite")
+    threads = []
+    load = cache._load
+    cache._load = lambda key: threads.append(threading.current_thread()) or load(key)
+
+    await cache.aset("key", [1])
+    cache._entries.clear()
+    assert await cache.aget("key") == [1]
+    assert threads and threading.main_thread() not in threads
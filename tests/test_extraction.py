@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import pytest
+
+from app.extraction import HTMLExtractor, extract_page
+
+
+PAGES = Path(__file__).parent / "fixtures" / "html"
+
+
+def load(name: str) -> str:
+    return (PAGES / name).read_text(encoding="utf-8")
+
+
+def test_article_main_content_is_extracted():
+    """Tests that navigation, sidebars and comments are left out."""
+    page = extract_page(load("article.html"), "https://example.com/blog/post")
+
+    assert page["title"] == "Tuning asyncio for I/O-heavy services"
+    assert page["text"].startswith("Tuning asyncio for I/O-heavy services\n")
+    for boilerplate in ("Archive", "Popular posts", "Great post", "Copyright"):
+        assert boilerplate not in page["text"]
+    assert "## What we changed" in page["markdown"]
+    assert (
+        "- Moved HTML parsing into a [process pool](https://example.com/docs/pools)."
+        in (page["markdown"])
+    )
+    assert "**less than 5%**" in page["markdown"]
+
+
+def test_split_content_and_tables():
+    """Tests that sibling posts are kept together and tables stay readable."""
+    forum = extract_page(load("forum.html"))
+    assert "How do I cancel a running task?" in forum["text"]
+    assert "cancelling the future only drops its result" in forum["text"]
+    assert "Sign up" not in forum["text"]
+    assert "    task.cancel()" in forum["markdown"]
+
+    docs = extract_page(load("docs.html"))
+    assert "retry_delay 60 Seconds to wait before retrying" in docs["text"]
+    assert "| Key | Default | Description |\n| --- | --- | --- |" in docs["markdown"]
+    assert "> Changing the engine" in docs["markdown"]
+
+
+def test_unparseable_input_gives_empty_page():
+    """Tests that empty documents don't raise."""
+    assert extract_page("") == {"title": "", "text": "", "markdown": ""}
+
+
+@pytest.mark.asyncio
+async def test_large_pages_are_extracted_in_worker(monkeypatch: pytest.MonkeyPatch):
+    """Tests that the process pool path gives the same result as inline parsing."""
+    monkeypatch.setattr(HTMLExtractor, "inline_limit", 0)
+    html = load("article.html")
+    try:
+        page = await HTMLExtractor.extract(html)
+        # Workers must not be forked from a process with running threads
+        assert HTMLExtractor._pool._mp_context.get_start_method() != "fork"
+    finally:
+        HTMLExtractor.shutdown()
+
+    assert page.model_dump() == extract_page(html)
@@ -0,0 +1,208 @@
+from typing import List
+
+import pytest
+
+from app.cache import TTLCache
+from app.config import LLMSettings
+from app.llm import LLM, TokenCounter
+from app.schema import Memory, Message, ToolCall
+from tests.conftest import (
+    CountingClient,
+    StreamingClient,
+    WhitespaceTokenizer,
+    make_chunk,
+)
+
+
+def test_cached_count_matches_formatted_count(counter: TokenCounter):
+    """Tests that cached Message counts equal counts of the formatted dicts."""
+    messages = [
+        Message.system_message("You are a helpful agent"),
+        Message.user_message("Find the weather in Tokyo"),
+        Message.tool_message("Sunny, 21 degrees", name="web_search", tool_call_id="c1"),
+        Message.user_message("Screenshot:", base64_image="aGVsbG8="),
+    ]
+
+    for supports_images in (False, True):
+        formatted = LLM.format_messages(messages, supports_images)
+        assert counter.count_message_tokens(
+            messages, supports_images
+        ) == counter.count_message_tokens(formatted)
+
+
+def test_memory_counts_messages_once(
+    counter: TokenCounter, tokenizer: WhitespaceTokenizer
+):
+    """Tests that messages added to memory are only encoded once."""
+    memory = Memory(token_counter=counter)
+    memory.add_message(Message.user_message("first message"))
+    memory.add_messages(
+        [Message.assistant_message("second"), Message.user_message("third one")]
+    )
+    calls_after_add = tokenizer.encode_calls
+
+    first = memory.count_tokens()
+    assert memory.count_tokens() == first
+    assert tokenizer.encode_calls == calls_after_add
+
+
+def test_message_mutation_invalidates_count(counter: TokenCounter):
+    """Tests that changing a message field drops its cached count."""
+    message = Message.user_message("one two")
+    before = counter.count_cached_message(message)
+
+    message.content = "one two three four"
+
+    assert counter.count_cached_message(message) == before + 2
+
+
+def test_formatted_messages_are_reused_until_mutated():
+    """Tests that formatting a Message twice reuses the same dict and image part."""
+    message = Message.user_message("Screenshot:", base64_image="aGVsbG8=")
+
+    first = LLM.format_messages([message], supports_images=True)[0]
+    second = LLM.format_messages([message], supports_images=True)[0]
+    assert second is first
+    assert first["content"] == [
+        {"type": "text", "text": "Screenshot:"},
+        {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,aGVsbG8="}},
+    ]
+    assert LLM.format_messages([message]) == [
+        {"role": "user", "content": "Screenshot:"}
+    ]
+
+    message.base64_image = None
+    assert LLM.format_messages([message], supports_images=True) == [
+        {"role": "user", "content": "Screenshot:"}
+    ]
+
+
+def test_text_cache_hits_and_eviction(
+    counter: TokenCounter, tokenizer: WhitespaceTokenizer, monkeypatch
+):
+    """Tests the shared text cache counters and LRU eviction."""
+    monkeypatch.setattr(TokenCounter, "CACHE_MAX_SIZE", 2)
+
+    assert counter.count_text("system prompt text") == 3
+    assert counter.count_text("system prompt text") == 3
+    assert tokenizer.encode_calls == 1
+    assert TokenCounter.cache_info()["hits"] == 1
+
+    counter.count_text("b")
+    counter.count_text("system prompt text")  # Refresh as most recently used
+    counter.count_text("c")  # Evicts "b"
+    info = TokenCounter.cache_info()
+    assert info["size"] == 2
+    assert info["misses"] == 3
+
+    counter.count_text("b")
+    assert TokenCounter.cache_info()["misses"] == 4
+
+
+def test_client_shared_per_endpoint(monkeypatch):
+    """Tests that configs for the same endpoint share one API client."""
+    monkeypatch.setattr(LLM, "_clients", {})
+    settings = dict(
+        model="gpt-4o",
+        base_url="https://api.example.com/v1",
+        api_key="key",
+        api_type="openai",
+        api_version="",
+    )
+
+    default = LLM._get_client(LLMSettings(**settings))
+    vision = LLM._get_client(LLMSettings(**{**settings, "model": "gpt-4o-mini"}))
+    other = LLM._get_client(LLMSettings(**{**settings, "api_key": "other"}))
+
+    assert default is vision
+    assert default is not other
+
+
+TOOL_CALL_CHUNKS = [
+    make_chunk(content="Searching "),
+    make_chunk(content="twice."),
+    make_chunk(
+        tool_call={
+            "index": 0,
+            "id": "call_a",
+            "type": "function",
+            "function": {"name": "web_search", "arguments": '{"query": '},
+        }
+    ),
+    make_chunk(tool_call={"index": 0, "function": {"arguments": '"tokyo"}'}}),
+    make_chunk(
+        tool_call={
+            "index": 1,
+            "id": "call_b",
+            "type": "function",
+            "function": {"name": "web_search", "arguments": '{"query": "kyoto"'},
+        }
+    ),
+    make_chunk(tool_call={"index": 1, "function": {"arguments": "}"}}),
+]
+
+
+@pytest.mark.asyncio
+async def test_ask_tool_stream_assembles_and_dispatches(offline_llm: LLM):
+    """Tests that streamed tool calls are dispatched once their JSON closes."""
+    offline_llm.client = StreamingClient(TOOL_CALL_CHUNKS)
+    dispatched: List[ToolCall] = []
+
+    message = await offline_llm.ask_tool(
+        messages=[Message.user_message("weather?")],
+        tools=[{"type": "function", "function": {"name": "web_search"}}],
+        stream=True,
+        on_tool_call=dispatched.append,
+    )
+
+    assert message.content == "Searching twice."
+    assert [call.id for call in message.tool_calls] == ["call_a", "call_b"]
+    assert message.tool_calls[1].function.arguments == '{"query": "kyoto"}'
+    assert [(call.id, call.function.arguments) for call in dispatched] == [
+        ("call_a", '{"query": "tokyo"}'),
+        ("call_b", '{"query": "kyoto"}'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_deterministic_responses_are_cached(offline_llm: LLM):
+    """Tests that temperature 0 requests are answered from the response cache."""
+    offline_llm.response_cache = TTLCache()
+    offline_llm.client = CountingClient({"role": "assistant", "content": "hello"})
+    messages = [Message.user_message("say hello")]
+
+    assert await offline_llm.ask(messages, stream=False) == "hello"
+    assert await offline_llm.ask(messages, stream=False) == "hello"
+    assert offline_llm.client.calls == 1
+    assert offline_llm.total_completion_tokens == 2
+
+    await offline_llm.ask(messages, stream=False, temperature=0.7)
+    assert offline_llm.client.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_cached_tool_calls_are_dispatched(offline_llm: LLM):
+    """Tests that cached tool call responses still reach the dispatch callback."""
+    offline_llm.response_cache = TTLCache()
+    offline_llm.client = CountingClient(
+        {
+            "role": "assistant",
+            "content": None,
+            "tool_calls": [
+                {
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": "terminate", "arguments": "{}"},
+                }
+            ],
+        }
+    )
+    messages = [Message.user_message("stop now")]
+    await offline_llm.ask_tool(messages)
+
+    dispatched: List[ToolCall] = []
+    message = await offline_llm.ask_tool(messages, on_tool_call=dispatched.append)
+
+    assert offline_llm.client.calls == 1
+    assert message.tool_calls[0].function.name == "terminate"
+    assert [call.id for call in dispatched] == ["call_1"]
@@ -0,0 +1,27 @@
+import pytest
+
+from app.config import LoggingSettings, config
+from app.logger import digest
+
+
+@pytest.fixture
+def digest_threshold(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        config._config, "logging", LoggingSettings(result_digest_threshold=10)
+    )
+
+
+def test_long_results_are_logged_as_digest(digest_threshold: None):
+    """Tests that only results over the threshold are shortened."""
+    assert digest("short") == "short"
+
+    summary = digest("x" * 5000)
+    assert summary.startswith("<5000 characters, sha1 ")
+    assert summary == digest("x" * 5000)
+    assert summary != digest("y" * 5000)
+
+
+def test_results_are_logged_in_full_by_default(monkeypatch: pytest.MonkeyPatch):
+    """Tests that digests are off unless configured."""
+    monkeypatch.setattr(config._config, "logging", LoggingSettings())
+    assert digest("x" * 5000) == "x" * 5000
@@ -0,0 +1,204 @@
+import base64
+import io
+
+from openai.types.chat import ChatCompletionMessageToolCall
+from PIL import Image
+
+from app.config import ImageRetentionSettings, MemoryCompactionSettings
+from app.llm import LLM, TokenCounter
+from app.schema import Function, Memory, Message, ToolCall
+
+
+def make_screenshot(size=(1600, 1200)) -> str:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "white").save(buffer, format="JPEG", quality=100)
+    return base64.b64encode(buffer.getvalue()).decode("utf-8")
+
+
+def test_older_images_are_downscaled(counter: TokenCounter):
+    """Tests that only the most recent images are kept at full detail."""
+    memory = Memory(
+        token_counter=counter,
+        image_retention=ImageRetentionSettings(keep_full=1, low_max_size=256),
+    )
+    screenshot = make_screenshot()
+    for step in range(3):
+        memory.add_message(Message.user_message(f"step {step}", screenshot))
+
+    old, _, latest = memory.messages
+    assert latest.base64_image == screenshot and latest.image_detail is None
+    assert old.image_detail == "low"
+    image = Image.open(io.BytesIO(base64.b64decode(old.base64_image)))
+    assert max(image.size) == 256
+
+    image_part = LLM.format_messages([old], supports_images=True)[0]["content"][1]
+    assert image_part["image_url"]["detail"] == "low"
+    assert counter.count_cached_message(old, supports_images=True) < (
+        counter.count_cached_message(latest, supports_images=True)
+    )
+
+
+def test_older_images_can_be_dropped():
+    """Tests that the drop policy removes old images but keeps their text."""
+    memory = Memory(image_retention=ImageRetentionSettings(keep_full=1, older="drop"))
+    memory.add_messages(
+        [Message.user_message(f"step {step}", make_screenshot()) for step in range(2)]
+    )
+
+    assert memory.messages[0].base64_image is None
+    assert memory.messages[0].content == "step 0"
+    assert memory.messages[1].base64_image is not None
+
+
+def test_images_are_kept_without_retention_limit():
+    """Tests that memory keeps every image unless a limit is configured."""
+    memory = Memory(image_retention=ImageRetentionSettings())
+    screenshot = make_screenshot((32, 32))
+    for step in range(3):
+        memory.add_message(Message.user_message(f"step {step}", screenshot))
+
+    assert all(message.base64_image == screenshot for message in memory.messages)
+
+
+def tool_exchange(step: int, output: str) -> list:
+    call = ToolCall(id=f"call_{step}", function=Function(name="bash", arguments="{}"))
+    return [
+        Message.from_tool_calls(tool_calls=[call], content=f"step {step}"),
+        Message.tool_message(output, name="bash", tool_call_id=f"call_{step}"),
+    ]
+
+
+def test_compaction_shortens_old_observations_first(counter: TokenCounter):
+    """Tests that old tool results are cut down before anything is dropped."""
+    memory = Memory(
+        token_counter=counter,
+        compaction=MemoryCompactionSettings(
+            token_budget=200, keep_recent=2, observation_max_chars=80
+        ),
+    )
+    memory.add_message(Message.user_message("Run the task"))
+    for step in range(3):
+        memory.add_messages(tool_exchange(step, "word " * 100))
+
+    assert len(memory.messages) == 7
+    assert memory.count_tokens() <= 200
+    assert all(len(m.content) <= 80 for m in memory.messages[1:5] if m.role == "tool")
+    assert memory.messages[-1].content == "word " * 100
+
+
+def test_compaction_drops_whole_exchanges(counter: TokenCounter):
+    """Tests that dropped tool calls take their results with them."""
+    memory = Memory(
+        token_counter=counter,
+        compaction=MemoryCompactionSettings(
+            token_budget=60, keep_recent=2, observation_max_chars=1000
+        ),
+    )
+    memory.add_message(Message.user_message("Run the task"))
+    for step in range(5):
+        memory.add_messages(tool_exchange(step, "some tool output here"))
+
+    note = memory.messages[1]
+    assert "earlier messages were removed" in note.content
+    # Only the note itself may go over the budget
+    assert memory.count_tokens() <= 60 + counter.count_cached_message(note)
+    assert memory.messages[0].content == "Run the task"
+    call_ids = {
+        call.id for m in memory.messages if m.tool_calls for call in m.tool_calls
+    }
+    results = [m.tool_call_id for m in memory.messages if m.role == "tool"]
+    assert results and set(results) <= call_ids
+    assert memory.messages[-1].tool_call_id == "call_4"
+
+
+def test_compaction_without_protected_messages(counter: TokenCounter):
+    """Tests that keep_recent=0 compacts without indexing past the end."""
+    memory = Memory(
+        token_counter=counter,
+        compaction=MemoryCompactionSettings(token_budget=50, keep_recent=0),
+    )
+    memory.add_message(Message.user_message("Run the task"))
+    for step in range(5):
+        memory.add_messages(tool_exchange(step, "some tool output here"))
+
+    assert memory.messages[0].content == "Run the task"
+    assert "earlier messages were removed" in memory.messages[1].content
+    results = [m.tool_call_id for m in memory.messages if m.role == "tool"]
+    call_ids = {
+        call.id for m in memory.messages if m.tool_calls for call in m.tool_calls
+    }
+    assert set(results) <= call_ids
+
+
+def test_message_limit_does_not_orphan_tool_results():
+    """Tests that truncating by count never leaves a result without its call."""
+    memory = Memory(max_messages=3)
+    for step in range(2):
+        memory.add_messages(tool_exchange(step, "done"))
+
+    assert memory.messages[0].role == "assistant"
+    assert memory.messages[1].tool_call_id == "call_1"
+
+
+def test_memory_buffer_evicts_and_slices():
+    """Tests that memory stays bounded and supports list-style access."""
+    memory = Memory(max_messages=3)
+    for step in range(5):
+        memory.add_message(Message.user_message(f"step {step}"))
+
+    assert [m.content for m in memory.messages] == ["step 2", "step 3", "step 4"]
+    assert [m.content for m in memory.get_recent_messages(2)] == ["step 3", "step 4"]
+    assert [m.content for m in memory.messages[:-1]] == ["step 2", "step 3"]
+    assert memory.messages[-1].content == "step 4"
+    assert len([Message.system_message("system")] + memory.messages) == 4
+    assert memory.to_dict_list()[0] == {"role": "user", "content": "step 2"}
+
+    memory.messages = [Message.user_message(str(i)) for i in range(10)]
+    assert [m.content for m in memory.messages] == ["7", "8", "9"]
+
+
+def test_message_from_openai_tool_calls():
+    """Tests that tool calls from the OpenAI client serialize like our own."""
+    call = ChatCompletionMessageToolCall.model_validate(
+        {
+            "id": "call_0",
+            "type": "function",
+            "function": {"name": "bash", "arguments": '{"command": "ls"}'},
+        }
+    )
+    message = Message.from_tool_calls(tool_calls=[call], content="Listing files")
+
+    assert message.to_dict()["tool_calls"] == [call.model_dump()]
+    assert message.model_copy().to_formatted_dict() == message.to_formatted_dict()
+
+
+def test_repeated_tool_calls_are_counted():
+    """Tests that identical tool calls repeat even when the content differs."""
+    memory = Memory(max_messages=4)
+    for step in range(3):
+        memory.add_messages(tool_exchange(step, "done"))
+    # Only the last two exchanges are still in memory
+    assert memory.repeat_count() == 1
+
+    memory.add_message(Message.assistant_message("step 2"))
+    assert memory.repeat_count() == 1
+    memory.add_message(Message.assistant_message("finished"))
+    assert memory.repeat_count() == 0
+
+    memory.messages = [Message.assistant_message("same")] * 3
+    assert memory.repeat_count() == 2
+    memory.clear()
+    assert memory.repeat_count() == 0
+
+
+def test_memory_round_trips_through_json():
+    """Tests that the message buffer dumps as a list and validates back."""
+    memory = Memory(max_messages=5)
+    memory.add_messages([Message.user_message("hi"), Message.assistant_message("hey")])
+
+    dumped = memory.model_dump()
+    assert dumped["messages"] == [m.model_dump() for m in memory.messages]
+
+    restored = Memory.model_validate_json(memory.model_dump_json())
+    assert list(restored.messages) == list(memory.messages)
+    assert restored.messages.maxlen == 5
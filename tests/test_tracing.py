@@ -0,0 +1,184 @@
+import asyncio
+import json
+import threading
+from pathlib import Path
+from typing import Iterator, List
+
+import pytest
+
+from app.agent.toolcall import ToolCallAgent
+from app.llm import LLM
+from app.tracing import NOOP_SPAN, JSONLSpanExporter, OTLPFileExporter, Span, tracer
+from tests.conftest import CountingClient, StreamingClient, make_chunk
+
+
+@pytest.fixture
+def span_file(tmp_path: Path) -> Iterator[Path]:
+    path = tmp_path / "traces.jsonl"
+    previous = tracer.exporter
+    tracer.exporter = JSONLSpanExporter(path)
+    yield path
+    tracer.exporter = previous
+
+
+def read_spans(path: Path) -> List[dict]:
+    JSONLSpanExporter.flush()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_disabled_tracer_hands_out_noop_span():
+    """Tests that nothing is recorded while tracing is off."""
+    previous, tracer.exporter = tracer.exporter, None
+    try:
+        with tracer.span("anything") as span:
+            assert span is NOOP_SPAN
+            assert tracer.current_span() is NOOP_SPAN
+    finally:
+        tracer.exporter = previous
+
+
+@pytest.mark.asyncio
+async def test_agent_run_is_traced(offline_llm: LLM, span_file: Path):
+    """Tests that run, step, think, act, LLM and tool spans nest correctly."""
+    offline_llm.client = CountingClient(
+        {
+            "role": "assistant",
+            "content": "Done",
+            "tool_calls": [
+                {
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {
+                        "name": "terminate",
+                        "arguments": '{"status": "success"}',
+                    },
+                }
+            ],
+        }
+    )
+    agent = ToolCallAgent(llm=offline_llm)
+
+    await agent.run("Finish right away")
+
+    spans = {span["name"]: span for span in read_spans(span_file)}
+    assert set(spans) == {
+        "agent.run",
+        "agent.step",
+        "agent.think",
+        "llm.ask_tool",
+        "agent.act",
+        "tool.execute",
+    }
+    parents = {name: span["parent_id"] for name, span in spans.items()}
+    ids = {name: span["span_id"] for name, span in spans.items()}
+    assert parents["agent.run"] is None
+    assert parents["agent.step"] == ids["agent.run"]
+    assert parents["agent.think"] == parents["agent.act"] == ids["agent.step"]
+    assert parents["llm.ask_tool"] == ids["agent.think"]
+    assert parents["tool.execute"] == ids["agent.act"]
+    assert len({span["trace_id"] for span in spans.values()}) == 1
+
+    assert spans["llm.ask_tool"]["attributes"]["llm.completion_tokens"] == 2
+    assert spans["tool.execute"]["attributes"]["tool.name"] == "terminate"
+    assert spans["agent.run"]["attributes"]["agent.steps"] == 1
+
+
+@pytest.mark.asyncio
+async def test_early_tool_calls_are_traced_under_step(
+    offline_llm: LLM, span_file: Path
+):
+    """Tests that tool calls dispatched mid-stream aren't children of the LLM span."""
+    offline_llm.client = StreamingClient(
+        [
+            make_chunk(
+                tool_call={
+                    "index": 0,
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {
+                        "name": "terminate",
+                        "arguments": '{"status": "success"}',
+                    },
+                }
+            )
+        ]
+    )
+    agent = ToolCallAgent(llm=offline_llm, stream_tool_calls=True)
+
+    await agent.run("Finish right away")
+
+    spans = {span["name"]: span for span in read_spans(span_file)}
+    assert spans["tool.execute"]["parent_id"] == spans["agent.step"]["span_id"]
+
+
+@pytest.mark.asyncio
+async def test_streamed_ask_with_images_is_traced(offline_llm: LLM, span_file: Path):
+    """Tests that streamed image requests record their model and timing."""
+    offline_llm.model = "gpt-4o"
+    offline_llm.client = StreamingClient([make_chunk("A"), make_chunk(" cat")])
+
+    response = await offline_llm.ask_with_images(
+        [{"role": "user", "content": "What is this?"}],
+        images=["https://example.com/cat.png"],
+        stream=True,
+    )
+
+    assert response == "A cat"
+    (span,) = read_spans(span_file)
+    assert span["name"] == "llm.ask_with_images"
+    assert span["attributes"]["llm.model"] == "gpt-4o"
+    assert span["attributes"]["llm.input_tokens"] > 0
+    assert "llm.time_to_first_token_ms" in span["attributes"]
+
+
+def test_failed_span_records_error(span_file: Path):
+    """Tests that an exception leaving a span is recorded on it."""
+    with pytest.raises(asyncio.TimeoutError):
+        with tracer.span("llm.ask"):
+            raise asyncio.TimeoutError("slow endpoint")
+
+    (span,) = read_spans(span_file)
+    assert span["error"] == "TimeoutError: slow endpoint"
+
+
+def test_spans_are_written_off_the_calling_thread(tmp_path: Path, monkeypatch):
+    """Tests that exporters queue spans for the writer thread."""
+    writers = set()
+    open_file = Path.open
+
+    def recording_open(path: Path, mode: str = "r", *args, **kwargs):
+        if "a" in mode:
+            writers.add(threading.current_thread().name)
+        return open_file(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "open", recording_open)
+    exporters = [JSONLSpanExporter(tmp_path / f"{i}.jsonl") for i in range(2)]
+    for i in range(10):
+        exporters[i % 2].export(Span(f"span {i}"))
+
+    for i, exporter in enumerate(exporters):
+        names = [span["name"] for span in read_spans(exporter.path)]
+        assert names == [f"span {n}" for n in range(i, 10, 2)]
+    assert writers == {"span-writer"}
+
+
+def test_otlp_encoding(tmp_path: Path):
+    """Tests that spans are written as OTLP JSON export requests."""
+    parent = Span("agent.run")
+    span = Span("tool.execute", parent, {"tool.name": "bash", "tool.retries": 1})
+    span.end_ns = span.start_ns + 1000
+
+    record = OTLPFileExporter(tmp_path / "otlp.jsonl", "bench").encode(span)
+
+    resource_spans = record["resourceSpans"][0]
+    assert resource_spans["resource"]["attributes"] == [
+        {"key": "service.name", "value": {"stringValue": "bench"}}
+    ]
+    otlp_span = resource_spans["scopeSpans"][0]["spans"][0]
+    assert otlp_span["traceId"] == parent.trace_id
+    assert otlp_span["parentSpanId"] == parent.span_id
+    assert otlp_span["endTimeUnixNano"] == str(span.start_ns + 1000)
+    assert {"key": "tool.retries", "value": {"intValue": "1"}} in otlp_span[
+        "attributes"
+    ]
+    assert otlp_span["status"] == {"code": 1}
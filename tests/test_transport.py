@@ -0,0 +1,88 @@
+import pytest
+from tenacity import wait_none
+
+from app.llm import LLM
+from app.schema import Message
+from app.transport import RecordingTransport, ReplayMissError, ReplayTransport
+from tests.conftest import CountingClient, StreamingClient, make_chunk
+
+
+TOOL_CALL_CHUNKS = [
+    make_chunk(
+        tool_call={
+            "index": 0,
+            "id": "call_1",
+            "type": "function",
+            "function": {"name": "terminate", "arguments": '{"status": '},
+        }
+    ),
+    make_chunk(tool_call={"index": 0, "function": {"arguments": '"success"}'}}),
+]
+
+
+@pytest.mark.asyncio
+async def test_recorded_exchanges_replay_offline(offline_llm: LLM, tmp_path):
+    """Tests that plain and streamed responses replay from a recording."""
+    path = tmp_path / "llm.jsonl"
+    question = [Message.user_message("say hello")]
+    task = [Message.user_message("finish the task")]
+
+    offline_llm.client = RecordingTransport(
+        CountingClient({"role": "assistant", "content": "hello"}), path
+    )
+    answer = await offline_llm.ask(question, stream=False)
+    offline_llm.client = RecordingTransport(StreamingClient(TOOL_CALL_CHUNKS), path)
+    recorded = await offline_llm.ask_tool(task, stream=True)
+
+    offline_llm.client = ReplayTransport(path)
+    assert await offline_llm.ask(question, stream=False) == answer
+    dispatched = []
+    replayed = await offline_llm.ask_tool(
+        task, stream=True, on_tool_call=dispatched.append
+    )
+    assert replayed.model_dump() == recorded.model_dump()
+    assert [call.function.name for call in dispatched] == ["terminate"]
+
+
+@pytest.mark.asyncio
+async def test_unmatched_requests(tmp_path):
+    """Tests strict misses and in-order fallback for unmatched requests."""
+    path = tmp_path / "llm.jsonl"
+    recorder = RecordingTransport(
+        CountingClient({"role": "assistant", "content": "first"}), path
+    )
+    await recorder.create(model="offline", messages=[{"role": "user", "content": "a"}])
+
+    with pytest.raises(ReplayMissError):
+        await ReplayTransport(path).create(model="offline", messages=[])
+
+    replay = ReplayTransport(path, strict=False)
+    response = await replay.create(model="offline", messages=[])
+    assert response.choices[0].message.content == "first"
+    with pytest.raises(ReplayMissError):
+        await replay.create(model="offline", messages=[])
+
+
+class CountingReplay(ReplayTransport):
+    """Replay transport that counts the requests it answers."""
+
+    calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        return await super().create(**params)
+
+
+@pytest.mark.asyncio
+async def test_replay_miss_is_not_retried(
+    offline_llm: LLM, tmp_path, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that a request missing from the recording fails on the first try."""
+    monkeypatch.setattr(LLM.ask.retry, "wait", wait_none())
+    path = tmp_path / "llm.jsonl"
+    path.touch()
+    offline_llm.client = CountingReplay(path)
+
+    with pytest.raises(ReplayMissError):
+        await offline_llm.ask([Message.user_message("say hello")], stream=False)
+    assert offline_llm.client.calls == 1
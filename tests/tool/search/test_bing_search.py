@@ -0,0 +1,65 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.tool.search.bing_search import BingSearchEngine
+
+
+def result_page(first: int, count: int = 10) -> str:
+    items = "".join(
+        f"<li class='b_algo'><h2><a href='https://example.com/{first + i}'>"
+        f"Result {first + i}</a></h2><p>About result {first + i}</p></li>"
+        for i in range(count)
+    )
+    next_link = f"<a title='Next page' href='/search?first={first + count}'>Next</a>"
+    return f"<html><body><ol id='b_results'>{items}</ol>{next_link}</body></html>"
+
+
+@pytest.mark.asyncio
+async def test_result_pages_are_fetched_concurrently():
+    """Tests that all pages needed for the requested results are fetched at once."""
+    requested = []
+    both_sent = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        first = int(request.url.params["first"])
+        requested.append(first)
+        if len(requested) == 2:
+            both_sent.set()
+        # A serial implementation would never send the second request
+        await asyncio.wait_for(both_sent.wait(), timeout=1)
+        return httpx.Response(200, text=result_page(first))
+
+    engine = BingSearchEngine()
+    engine._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    engine._client_loop = asyncio.get_running_loop()
+
+    results = await engine.perform_search_async("python asyncio", num_results=15)
+
+    assert sorted(requested) == [1, 11]
+    assert [item.url for item in results] == [
+        f"https://example.com/{i}" for i in range(1, 16)
+    ]
+    assert results[0].description == "About result 1"
+
+
+def test_client_from_previous_loop_is_closed():
+    """Tests that a new event loop closes the client made on the old one."""
+    engine = BingSearchEngine()
+
+    async def get_client() -> httpx.AsyncClient:
+        return engine._get_client()
+
+    old_loop, new_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        old_client = old_loop.run_until_complete(get_client())
+        new_client = new_loop.run_until_complete(get_client())
+        # The close runs on the loop the client was created on
+        old_loop.run_until_complete(asyncio.sleep(0))
+
+        assert new_client is not old_client
+        assert old_client.is_closed and not new_client.is_closed
+    finally:
+        old_loop.close()
+        new_loop.close()
@@ -0,0 +1,60 @@
+from typing import List
+
+import pytest
+
+from app.llm import TokenCounter
+from app.tool.base import BaseTool
+from app.tool.tool_collection import ToolCollection
+
+
+class EchoTool(BaseTool):
+    name: str = "echo"
+    description: str = "Echo the given text back."
+    parameters: dict = {
+        "type": "object",
+        "properties": {"text": {"type": "string"}},
+        "required": ["text"],
+    }
+
+    async def execute(self, text: str) -> str:
+        return text
+
+
+class CharTokenizer:
+    name = "chars"
+
+    def encode(self, text: str) -> List[str]:
+        return list(text)
+
+
+@pytest.fixture
+def counter() -> TokenCounter:
+    TokenCounter.clear_cache()
+    return TokenCounter(CharTokenizer())
+
+
+def test_params_are_cached_until_tools_change():
+    """Tests that to_params is rebuilt only after the tool set changes."""
+    collection = ToolCollection(EchoTool())
+    params = collection.to_params()
+    assert collection.to_params() is params
+
+    collection.add_tool(EchoTool(name="echo_again"))
+    assert collection.to_params() is not params
+    assert [p["function"]["name"] for p in collection.to_params()] == [
+        "echo",
+        "echo_again",
+    ]
+
+
+def test_params_token_cost_follows_tool_set(counter: TokenCounter):
+    """Tests that the cached token cost is invalidated with the params."""
+    collection = ToolCollection(EchoTool())
+    single = collection.count_tokens(counter)
+    assert single == counter.count_tools(collection.to_params())
+
+    collection.add_tools(EchoTool(name="echo_again"))
+    assert collection.count_tokens(counter) > single
+
+    collection.tools = tuple()
+    assert collection.count_tokens(counter) == 0
@@ -0,0 +1,355 @@
+import asyncio
+import time
+from typing import List
+
+import httpx
+import pytest
+
+from app.config import PageCacheSettings, SearchCacheSettings, SearchSettings, config
+from app.tool.search.base import SearchItem, WebSearchEngine
+from app.tool.web_search import (
+    CircuitBreaker,
+    EngineStats,
+    WebContentFetcher,
+    WebSearch,
+)
+
+
+class FakeEngine(WebSearchEngine):
+    """Search engine that answers after a delay, or finds nothing."""
+
+    delay: float = 0.0
+    urls: List[str] = []
+    calls: int = 0
+
+    def perform_search(self, query: str, num_results: int = 10, *args, **kwargs):
+        self.calls += 1
+        time.sleep(self.delay)
+        return [SearchItem(title=url, url=url) for url in self.urls[:num_results]]
+
+
+@pytest.fixture
+def search(monkeypatch: pytest.MonkeyPatch) -> WebSearch:
+    monkeypatch.setattr(WebSearch, "engine_stats", EngineStats())
+    monkeypatch.setattr(WebSearch, "rate_limiters", {})
+    monkeypatch.setattr(WebSearch, "circuit_breakers", {})
+    tool = WebSearch()
+    tool._search_engine = {
+        "google": FakeEngine(delay=0.3, urls=["https://a.com/", "https://b.com"]),
+        "bing": FakeEngine(delay=0.01, urls=["https://b.com/", "https://c.com"]),
+        "baidu": FakeEngine(urls=[]),
+    }
+    return tool
+
+
+def use_search_settings(monkeypatch: pytest.MonkeyPatch, **settings) -> None:
+    monkeypatch.setattr(
+        config._config,
+        "search_config",
+        SearchSettings(engine="google", fallback_engines=["bing", "baidu"], **settings),
+    )
+
+
+@pytest.mark.asyncio
+async def test_race_returns_fastest_engine(
+    search: WebSearch, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that a raced search doesn't wait for a slow primary engine."""
+    use_search_settings(monkeypatch, race=True, race_engines=2)
+
+    started = time.perf_counter()
+    results = await search._try_all_engines("query", 5, {})
+
+    assert time.perf_counter() - started < 0.25
+    assert [r.source for r in results] == ["bing", "bing"]
+    assert search.engine_stats.latency.keys() == {"bing"}
+
+
+@pytest.mark.asyncio
+async def test_race_merges_and_dedups(
+    search: WebSearch, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that merged results interleave engines and drop repeated URLs."""
+    use_search_settings(monkeypatch, race=True, race_engines=3, race_merge=True)
+
+    results = await search._try_all_engines("query", 5, {})
+
+    assert [r.url for r in results] == [
+        "https://a.com/",
+        "https://b.com/",
+        "https://c.com",
+    ]
+    assert [r.position for r in results] == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_adaptive_order_skips_failing_engine(
+    search: WebSearch, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that engines that keep failing move behind working ones."""
+    use_search_settings(monkeypatch, adaptive_order=True)
+    search.engine_stats.record("google", 5.0, success=False)
+
+    assert search._get_engine_order()[:2] == ["bing", "baidu"]
+    results = await search._try_all_engines("query", 5, {})
+
+    assert results[0].source == "bing"
+    assert search._search_engine["google"].calls == 0
+
+
+def test_engine_stats_rank():
+    """Tests that ranking weighs latency by error rate and keeps ties in order."""
+    stats = EngineStats(alpha=0.5)
+    stats.record("fast", 0.5, success=True)
+    stats.record("flaky", 0.5, success=True)
+    stats.record("flaky", 0.5, success=False)
+
+    assert stats.score("a") == stats.score("b")
+    assert stats.rank(["a", "flaky", "b", "fast"]) == ["fast", "flaky", "a", "b"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_engine_is_skipped(
+    search: WebSearch, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that an engine without a free slot is passed over instead of awaited."""
+    use_search_settings(
+        monkeypatch,
+        engine_rate_limits={"google": 0.01},
+        rate_limit_burst=1,
+        rate_limit_max_wait=0.1,
+    )
+    search._search_engine["google"].delay = 0
+
+    first = await search._try_all_engines("query", 5, {})
+    second = await search._try_all_engines("query", 5, {})
+
+    assert first[0].source == "google"
+    assert second[0].source == "bing"
+    assert search._search_engine["google"].calls == 1
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_is_skipped_and_probed(
+    search: WebSearch, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that a failing engine is skipped until a background probe succeeds."""
+    use_search_settings(monkeypatch, circuit_breaker=True, breaker_threshold=2)
+    google = search._search_engine["google"]
+    google.delay, google.urls = 0, []
+
+    for _ in range(3):
+        results = await search._try_all_engines("query", 5, {})
+        assert results[0].source == "bing"
+    breaker = search.circuit_breakers["google"]
+    assert breaker.is_open
+    assert google.calls == 2
+
+    # Once the cooldown has passed the next search starts a probe
+    google.urls = ["https://a.com/"]
+    breaker.opened_at -= breaker.cooldown
+    results = await search._try_all_engines("query", 5, {})
+    assert results[0].source == "bing"
+    await asyncio.gather(*search._probes)
+
+    assert not breaker.is_open
+    results = await search._try_all_engines("query", 5, {})
+    assert results[0].source == "google"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("run_for", [None, 0.05])
+async def test_cancelled_probe_can_be_retried(
+    search: WebSearch, monkeypatch: pytest.MonkeyPatch, run_for
+):
+    """Tests that a cancelled probe, started or not, doesn't block later probes."""
+    use_search_settings(monkeypatch, circuit_breaker=True, breaker_threshold=1)
+    breaker = search._get_circuit_breaker("google")
+    breaker.record(success=False)
+    breaker.opened_at -= breaker.cooldown
+
+    assert breaker.should_probe()
+    search._start_probe("google", "query", 5, {})
+    (probe,) = search._probes
+    if run_for is not None:
+        await asyncio.sleep(run_for)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    assert breaker.is_open and breaker.should_probe()
+
+
+def test_failed_probe_backs_off():
+    """Tests that each failed probe doubles the time until the next one."""
+    breaker = CircuitBreaker(threshold=1, cooldown=10, max_cooldown=30)
+    breaker.record(success=False)
+    assert breaker.is_open and not breaker.should_probe()
+
+    for expected in (20, 30):
+        breaker.opened_at -= breaker.current_cooldown
+        assert breaker.should_probe()
+        assert not breaker.should_probe()
+        breaker.record(success=False)
+        assert breaker.current_cooldown == expected
+
+
+@pytest.mark.asyncio
+async def test_search_results_are_cached(
+    search: WebSearch, monkeypatch: pytest.MonkeyPatch, tmp_path
+):
+    """Tests that normalized repeats of a search are answered from the cache."""
+    use_search_settings(monkeypatch)
+    monkeypatch.setattr(
+        config._config,
+        "search_cache",
+        SearchCacheSettings(enabled=True, database=str(tmp_path / "search.sqlite")),
+    )
+    monkeypatch.setattr(WebSearch, "_search_cache", None)
+    google = search._search_engine["google"]
+    google.delay = 0
+
+    first = await search.execute("Python  asyncio", num_results=2)
+    repeat = await search.execute("python asyncio ", num_results=2)
+    assert google.calls == 1
+    assert repeat.results == first.results
+
+    await search.execute("python asyncio", num_results=1)
+    await search.execute("python asyncio", num_results=2, lang="de")
+    assert google.calls == 3
+
+
+@pytest.fixture
+def fetch_client(monkeypatch: pytest.MonkeyPatch):
+    """Serve fetches from a handler instead of the network."""
+
+    def install(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(WebContentFetcher, "_client", client)
+        monkeypatch.setattr(WebContentFetcher, "_loop", asyncio.get_running_loop())
+        monkeypatch.setattr(WebContentFetcher, "_host_limits", {})
+
+    return install
+
+
+@pytest.mark.asyncio
+async def test_fetch_stops_reading_at_byte_cap(
+    fetch_client, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that large bodies are only read up to the byte cap."""
+    monkeypatch.setattr(WebContentFetcher, "max_bytes", 4096)
+    sent = []
+
+    async def body():
+        for _ in range(1000):
+            sent.append(1024)
+            yield b"word " * 205
+
+    fetch_client(
+        lambda request: httpx.Response(
+            200, headers={"content-type": "text/plain"}, content=body()
+        )
+    )
+
+    text = await WebContentFetcher.fetch_content("https://example.com/big.txt")
+
+    assert text.startswith("word word")
+    assert len(sent) < 10
+
+
+@pytest.mark.asyncio
+async def test_fetch_skips_binary_content(fetch_client):
+    """Tests that non-text responses are skipped and HTML is reduced to text."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith(".pdf"):
+            return httpx.Response(
+                200, headers={"content-type": "application/pdf"}, content=b"%PDF"
+            )
+        html = "<html><nav>Menu</nav><script>x()</script><p>Hello  there</p></html>"
+        return httpx.Response(
+            200, headers={"content-type": "text/html; charset=utf-8"}, text=html
+        )
+
+    fetch_client(handler)
+
+    assert await WebContentFetcher.fetch_content("https://example.com/a.pdf") is None
+    assert await WebContentFetcher.fetch_content("https://example.com/") == (
+        "Hello there"
+    )
+
+
+@pytest.fixture
+def page_cache(monkeypatch: pytest.MonkeyPatch, tmp_path):
+    """Enable a page cache in a temporary database."""
+
+    def install(**settings):
+        monkeypatch.setattr(
+            config._config,
+            "page_cache",
+            PageCacheSettings(
+                enabled=True, database=str(tmp_path / "pages.sqlite"), **settings
+            ),
+        )
+        monkeypatch.setattr(WebContentFetcher, "_page_cache", None)
+
+    return install
+
+
+@pytest.mark.asyncio
+async def test_cached_pages_are_revalidated(
+    fetch_client, page_cache, monkeypatch: pytest.MonkeyPatch
+):
+    """Tests that stale pages are revalidated with the stored validators."""
+    page_cache(max_age=60)
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/plain", "etag": '"v1"'},
+            text="Version one",
+        )
+
+    fetch_client(handler)
+    url = "https://example.com/page.txt"
+
+    assert await WebContentFetcher.fetch_content(url) == "Version one"
+    now[0] += 30
+    assert await WebContentFetcher.fetch_content(url) == "Version one"
+    assert len(requests) == 1
+
+    now[0] += 60
+    assert await WebContentFetcher.fetch_content(url) == "Version one"
+    assert len(requests) == 2
+    assert requests[1].headers["if-none-match"] == '"v1"'
+
+    # The 304 renewed the entry, so the next call needs no request
+    assert await WebContentFetcher.fetch_content(url) == "Version one"
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_offline_mode_serves_only_cached_pages(fetch_client, page_cache):
+    """Tests that offline mode answers from the cache without any requests."""
+    page_cache(max_age=0)
+    fetch_client(
+        lambda request: httpx.Response(
+            200, headers={"content-type": "text/plain"}, text=request.url.path
+        )
+    )
+    assert await WebContentFetcher.fetch_content("https://example.com/a") == "/a"
+
+    page_cache(max_age=0, offline=True)
+
+    def fail(request: httpx.Request) -> httpx.Response:
+        raise AssertionError("offline mode made a request")
+
+    fetch_client(fail)
+    assert await WebContentFetcher.fetch_content("https://example.com/a") == "/a"
+    assert await WebContentFetcher.fetch_content("https://example.com/b") is None